@@ -0,0 +1,131 @@
+"""Shared helpers for the standalone benchmark scripts.
+
+Benchmarks are run from the repository root, e.g.
+`python -m benchmarks.tokenize_lines --lines 20000`.
+"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence, Tuple
+
+SAMPLE_PARAGRAPHS = [
+    "このダンジョンからの脱出は諦めた。",
+    "　適当に歩き回ってたら、不意のエンカウントでデッドエンドの未来しか見えない。",
+    "　魔物にしろ、人間にしろ、今の私には等しく強敵だ。",
+    "　強敵と書いて、ライバル、とか、とも、とか読まない。",
+    "　正真正銘命の危険が危ないってやつだ。",
+    "",
+    "　幸い、というのかなんなのか、この狭い通路に出現する魔物は、そんなに素早いやつはいないっぽい。",
+    "　でなきゃ、私が逃げ切れるわけないし。",
+    "そもそもさー、私生まれ変わる前は「運動？　何それ？」ってタイプのインドア派よ？",
+    "そりゃ、野生の蜘蛛の方が運動能力高いに決まってるじゃん。",
+    "私が人に誇れる運動能力なんて、ゲームで鍛えた親指の動きくらいだって。",
+]
+
+
+def setup_django():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "src.settings")
+    import django
+
+    django.setup()
+
+
+def novel_lines(n_lines: int) -> List[str]:
+    """Build a novel-sized document by cycling through the sample paragraphs."""
+    n_samples = len(SAMPLE_PARAGRAPHS)
+    return [SAMPLE_PARAGRAPHS[i % n_samples] for i in range(n_lines)]
+
+
+def novel_text(n_bytes: int) -> str:
+    """Build a document of roughly `n_bytes` UTF-8 bytes."""
+    lines = []
+    size = 0
+    i = 0
+    while size < n_bytes:
+        line = SAMPLE_PARAGRAPHS[i % len(SAMPLE_PARAGRAPHS)]
+        lines.append(line)
+        size += len(line.encode("utf-8")) + 1
+        i += 1
+    return "\n".join(lines)
+
+
+def timeit(func: Callable, repeat: int = 3) -> Tuple[float, object]:
+    """Return the best wall-clock time of `repeat` runs and the last result."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def time_runs(func: Callable, repeat: int = 3) -> Tuple[Dict[str, float], object]:
+    """Like `timeit`, but return the best and median of the runs (in seconds)."""
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return {"best_s": min(times), "median_s": statistics.median(times)}, result
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of already sorted values, `q` in [0, 100]."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(q / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def _git(*args) -> str:
+    try:
+        return subprocess.run(
+            ["git", *args], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def environment() -> Dict:
+    """Where a benchmark ran: commit, interpreter, machine and app configuration."""
+    info = {
+        "commit": _git("rev-parse", "HEAD") or "unknown",
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+    from django.conf import settings
+
+    if settings.configured:
+        from django.db import connection
+
+        info.update(
+            database=connection.vendor,
+            tokenizer=settings.TOKENIZER_CLASS,
+            tokenizer_backend=settings.TOKENIZER_BACKEND,
+            jisho=settings.JISHO_CLASS,
+        )
+    return info
+
+
+def default_output(name: str) -> Path:
+    """`benchmarks/results/<name>-<commit>.json`, for comparing runs across commits."""
+    commit = _git("rev-parse", "--short", "HEAD") or "unknown"
+    return Path(__file__).parent / "results" / f"{name}-{commit}.json"
+
+
+def write_json(result: Dict, output: Path) -> None:
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+        f.write("\n")
@@ -0,0 +1,103 @@
+"""Microbenchmark of the character-class helpers in `src.services.tokenizer.utils`.
+
+The baseline re-implements the previous `unicodedata.name` based checks (with a
+default name so that unnamed codepoints do not raise) over a mixed-script corpus.
+"""
+import argparse
+import unicodedata
+
+from ._common import novel_lines, setup_django, timeit
+
+MIXED_SCRIPT_LINES = [
+    "Chapter 12: The 蜘蛛 returns — 第十二話「運動能力」",
+    "ＨＰ：１２０／１２０　ＭＰ：３５／３５　ＳＰ：８０",
+    "email: kumo@example.com\ttab\x00control\x1b[0m",
+    "🕷️ ♡ ☆ 𠮷野家 ｶﾀｶﾅ ひらがな カタカナ",
+]
+
+
+def _old_is_kanji(ch):
+    return "CJK UNIFIED IDEOGRAPH" in unicodedata.name(ch, "")
+
+
+def _old_is_hiragana(ch):
+    return "HIRAGANA" in unicodedata.name(ch, "")
+
+
+def _old_is_katakana(ch):
+    return "KATAKANA" in unicodedata.name(ch, "")
+
+
+def _old_is_japanese_char(ch):
+    return any([_old_is_kanji(ch), _old_is_hiragana(ch), _old_is_katakana(ch)])
+
+
+def _old_check_contains_kanji(word):
+    return any([_old_is_kanji(ch) for ch in word])
+
+
+def _old_check_only_japanese_chars(word):
+    return all([_old_is_japanese_char(ch) for ch in word])
+
+
+def corpus(n_lines: int):
+    japanese = novel_lines(n_lines)
+    n_mixed = len(MIXED_SCRIPT_LINES)
+    return [
+        line if i % 3 else MIXED_SCRIPT_LINES[i % n_mixed]
+        for i, line in enumerate(japanese)
+    ]
+
+
+def run(n_lines: int, repeat: int):
+    from src.services.tokenizer import utils
+
+    lines = corpus(n_lines)
+    words = [word for line in lines for word in line.split("、")]
+    chars = "".join(lines)
+
+    cases = {
+        "is_japanese_char": (
+            lambda: [_old_is_japanese_char(ch) for ch in chars],
+            lambda: [utils.is_japanese_char(ch) for ch in chars],
+        ),
+        "check_contains_kanji": (
+            lambda: [_old_check_contains_kanji(w) for w in words],
+            lambda: [utils.check_contains_kanji(w) for w in words],
+        ),
+        "check_only_japanese_chars": (
+            lambda: [_old_check_only_japanese_chars(w) for w in words],
+            lambda: [utils.check_only_japanese_chars(w) for w in words],
+        ),
+    }
+    results = {"chars": len(chars), "words": len(words)}
+    for name, (old, new) in cases.items():
+        before, expected = timeit(old, repeat)
+        after, actual = timeit(new, repeat)
+        assert expected == actual, name
+        results[name] = {
+            "before_sec": before,
+            "after_sec": after,
+            "speedup": before / after,
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    setup_django()
+    result = run(args.lines, args.repeat)
+    print(f"{result['chars']} chars, {result['words']} words")
+    for name, timing in result.items():
+        if isinstance(timing, dict):
+            print(
+                f"  {name}: {timing['before_sec']:.3f}s -> {timing['after_sec']:.3f}s "
+                f"({timing['speedup']:.1f}x)"
+            )
+
+
+if __name__ == "__main__":
+    main()
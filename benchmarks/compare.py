@@ -0,0 +1,80 @@
+"""Compare two benchmark JSON files (from `suite` or `load_api`) and flag regressions.
+
+Timings (`*_s`, `*_ms`) should go down and rates (`*_per_sec`, `*_rps`) should go
+up; any metric worse than `--threshold` is reported and makes the command exit
+with status 1, so it can gate CI runs.
+"""
+import argparse
+import json
+import sys
+from typing import Dict, Iterator, Tuple
+
+LOWER_IS_BETTER = ("_s", "_ms")
+HIGHER_IS_BETTER = ("_per_sec", "_rps")
+
+
+def _metrics(results: Dict, prefix: str = "") -> Iterator[Tuple[str, float]]:
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            yield from _metrics(value, f"{name}.")
+        elif isinstance(value, (int, float)) and key.endswith(
+            LOWER_IS_BETTER + HIGHER_IS_BETTER
+        ):
+            yield name, value
+
+
+def compare(old: Dict, new: Dict, threshold: float) -> Dict[str, Dict]:
+    """Relative change of every metric present in both results.
+
+    `change` is positive when the new run is better.
+    """
+    old_metrics = dict(_metrics(old["results"]))
+    changes = {}
+    for name, new_value in _metrics(new["results"]):
+        old_value = old_metrics.get(name)
+        if not old_value or not new_value:
+            continue
+        if name.endswith(HIGHER_IS_BETTER):
+            change = new_value / old_value - 1
+        else:
+            change = old_value / new_value - 1
+        changes[name] = {
+            "old": old_value,
+            "new": new_value,
+            "change": change,
+            "regression": change < -threshold,
+        }
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Relative slowdown reported as a regression (default: 0.1)",
+    )
+    args = parser.parse_args()
+    with open(args.old, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+
+    print(f"{old['environment']['commit'][:10]} -> {new['environment']['commit'][:10]}")
+    changes = compare(old, new, args.threshold)
+    for name, change in changes.items():
+        flag = "REGRESSION" if change["regression"] else ""
+        print(
+            f"{name:70} {change['old']:>12.4g} {change['new']:>12.4g} "
+            f"{change['change']:>+8.1%} {flag}"
+        )
+    if any(change["regression"] for change in changes.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
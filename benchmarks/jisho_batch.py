@@ -0,0 +1,44 @@
+"""Compare one dictionary lookup per word with the batched `lookup_many`."""
+import argparse
+
+from ._common import setup_django, timeit
+from .jisho_cache import WORDS
+
+
+def run(repeat: int):
+    from src.services.dictionary.states import DefaultJisho
+
+    lookup = DefaultJisho.lookup.__wrapped__
+    lookup_many = DefaultJisho.lookup_many.__wrapped__
+
+    def per_word():
+        return {word: lookup(DefaultJisho, word) for word in WORDS}
+
+    def batch():
+        return lookup_many(DefaultJisho, WORDS)
+
+    before, expected = timeit(per_word, repeat)
+    after, actual = timeit(batch, repeat)
+    assert expected == actual
+    return {
+        "words": len(WORDS),
+        "per_word_ms": before * 1000,
+        "batch_ms": after * 1000,
+        "speedup": before / after,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    setup_django()
+    result = run(args.repeat)
+    print(
+        f"{result['words']} words: per-word {result['per_word_ms']:.0f}ms, "
+        f"batch {result['batch_ms']:.0f}ms ({result['speedup']:.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
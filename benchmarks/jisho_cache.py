@@ -0,0 +1,58 @@
+"""Compare uncached dictionary lookups with the two-tier lookup cache."""
+import argparse
+
+from ._common import setup_django, timeit
+
+WORDS = [
+    "脱出", "諦める", "適当", "歩く", "回る", "不意", "エンカウント", "未来", "見える",
+    "魔物", "人間", "今", "私", "等しい", "強敵", "書く", "読む", "正真正銘", "命",
+    "危険", "危ない", "幸い", "狭い", "通路", "出現", "素早い", "逃げる", "切れる",
+    "生まれ変わる", "前", "運動", "インドア", "派", "野生", "蜘蛛", "方", "能力",
+    "高い", "決まる", "人", "誇る", "鍛える", "親指", "動き", "キャラ作り",
+]  # fmt: skip
+
+
+def run(n_lookups: int, repeat: int):
+    from src.services.dictionary.states import DefaultJisho
+    from src.services.dictionary.cache import get_lookup_cache
+
+    words = [WORDS[i % len(WORDS)] for i in range(n_lookups)]
+    lookup = DefaultJisho.lookup.__wrapped__
+
+    def uncached():
+        return [lookup(DefaultJisho, word) for word in words]
+
+    def cached():
+        return [DefaultJisho.lookup(word) for word in words]
+
+    before, expected = timeit(uncached, repeat)
+    get_lookup_cache().clear()
+    after, actual = timeit(cached, repeat)
+    assert expected == actual
+    return {
+        "lookups": len(words),
+        "uncached_us_per_lookup": before / len(words) * 1e6,
+        "cached_us_per_lookup": after / len(words) * 1e6,
+        "speedup": before / after,
+        "cache": DefaultJisho.cache_stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lookups", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    setup_django()
+    result = run(args.lookups, args.repeat)
+    print(
+        f"{result['lookups']} lookups: "
+        f"uncached {result['uncached_us_per_lookup']:.1f}us/lookup, "
+        f"cached {result['cached_us_per_lookup']:.1f}us/lookup "
+        f"({result['speedup']:.1f}x)"
+    )
+    print(f"cache: {result['cache']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Compare uncached lookups of Jamdict's SQLite database and the compact JMdict index.
+
+Build the index first with `python manage.py build_jmdict_index`.
+"""
+import argparse
+
+from ._common import setup_django, timeit
+from .jisho_cache import WORDS
+
+
+def run(n_lookups: int, repeat: int):
+    from src.services.dictionary.compact import CompactJisho
+    from src.services.dictionary.jamdict import JamdictJisho
+
+    words = [WORDS[i % len(WORDS)] for i in range(n_lookups)]
+    index = CompactJisho.load()
+    jamdict_lookup = JamdictJisho.lookup.__wrapped__
+
+    def jamdict():
+        return [jamdict_lookup(JamdictJisho, word) for word in words]
+
+    def compact():
+        return [index.get(word) for word in words]
+
+    def compact_keys():
+        return [index._entry_offsets(word.encode("utf-8")) for word in words]
+
+    before, expected = timeit(jamdict, repeat)
+    after, actual = timeit(compact, repeat)
+    keys, _ = timeit(compact_keys, repeat)
+    assert expected == actual
+    return {
+        "lookups": len(words),
+        "jamdict_us_per_lookup": before / len(words) * 1e6,
+        "compact_us_per_lookup": after / len(words) * 1e6,
+        "compact_key_us_per_lookup": keys / len(words) * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lookups", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    setup_django()
+    result = run(args.lookups, args.repeat)
+    print(
+        f"{result['lookups']} lookups: "
+        f"jamdict {result['jamdict_us_per_lookup']:.1f}us/lookup, "
+        f"compact {result['compact_us_per_lookup']:.1f}us/lookup "
+        f"(key search {result['compact_key_us_per_lookup']:.1f}us)"
+    )
+
+
+if __name__ == "__main__":
+    main()
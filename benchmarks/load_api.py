@@ -0,0 +1,180 @@
+"""Load generation for the notebook CRUD API of a running server.
+
+Each of `--concurrency` clients logs in with its own session and repeatedly creates,
+reads, lists, updates and deletes a notebook; the latency of every operation and the
+overall throughput are written as JSON. Start the server first, against SQLite or
+PostgreSQL (see `DB_ENGINE` in `src/settings.py`), e.g.
+
+    python manage.py runserver --noreload
+    python -m benchmarks.load_api --username user1 --password P@ssw0rd
+
+`--path /api/async/notebooks` exercises the async endpoints of an ASGI server.
+With `NOTEBOOK_ASYNC_PARSING=true` creation only queues the parsing, run with it
+disabled to measure parsing inside the requests.
+"""
+import argparse
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import requests
+
+from ._common import (
+    default_output,
+    environment,
+    novel_text,
+    percentile,
+    write_json,
+)
+
+OPERATIONS = ["create", "get", "list", "update", "delete"]
+
+
+class Client:
+    def __init__(self, base_url: str, path: str):
+        self.base_url = base_url.rstrip("/")
+        self.path = path.rstrip("/")
+        self.session = requests.Session()
+
+    def _headers(self) -> Dict[str, str]:
+        return {"X-XSRF-TOKEN": self.session.cookies.get("XSRF-TOKEN", "")}
+
+    def login(self, username: str, password: str):
+        self.session.get(f"{self.base_url}/api/auth/csrf-token").raise_for_status()
+        response = self.session.post(
+            f"{self.base_url}/api/auth/login",
+            json={"username": username, "password": password},
+            headers=self._headers(),
+        )
+        response.raise_for_status()
+
+    def request(self, method: str, path: str = "", **kwargs) -> requests.Response:
+        return self.session.request(
+            method,
+            f"{self.base_url}{self.path}/{path}",
+            headers=self._headers(),
+            **kwargs,
+        )
+
+
+def _run_client(args, content: str, latencies: Dict, errors: Dict, lock) -> None:
+    client = Client(args.url, args.path)
+    client.login(args.username, args.password)
+
+    def timed(operation: str, *request_args, **request_kwargs):
+        start = time.perf_counter()
+        try:
+            response = client.request(*request_args, **request_kwargs)
+            failed = response.status_code >= 400
+        except requests.RequestException:
+            response = None
+            failed = True
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies[operation].append(elapsed)
+            if failed:
+                errors[operation] += 1
+        return None if failed else response
+
+    for i in range(args.iterations):
+        created = timed(
+            "create",
+            "POST",
+            json={"title": f"load test {i}", "description": "", "content": content},
+        )
+        if created is None:
+            continue
+        notebook_id = created.json()["id"]
+        timed("get", "GET", f"{notebook_id}")
+        timed("list", "GET", params={"limit": 20})
+        timed("update", "PATCH", f"{notebook_id}", json={"title": f"updated {i}"})
+        timed("delete", "DELETE", f"{notebook_id}")
+
+
+def _summary(latencies: List[float], errors: int) -> Dict:
+    latencies = sorted(latencies)
+    if not latencies:
+        return {"count": 0, "errors": errors}
+    return {
+        "count": len(latencies),
+        "errors": errors,
+        "mean_ms": sum(latencies) / len(latencies) * 1000,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": latencies[-1] * 1000,
+    }
+
+
+def run(args) -> Dict:
+    content = novel_text(args.content_bytes)
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        futures = [
+            executor.submit(_run_client, args, content, latencies, errors, lock)
+            for _ in range(args.concurrency)
+        ]
+        for future in futures:
+            future.result()
+    duration = time.perf_counter() - start
+
+    n_requests = sum(len(values) for values in latencies.values())
+    return {
+        "environment": environment(),
+        "parameters": {
+            "url": args.url,
+            "path": args.path,
+            "concurrency": args.concurrency,
+            "iterations": args.iterations,
+            "content_bytes": args.content_bytes,
+        },
+        "results": {
+            "duration_s": duration,
+            "requests": n_requests,
+            "errors": sum(errors.values()),
+            "throughput_rps": n_requests / duration,
+            "operations": {
+                operation: _summary(latencies[operation], errors[operation])
+                for operation in OPERATIONS
+            },
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--path", default="/api/notebooks")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--content-bytes", type=int, default=8 * 1024)
+    parser.add_argument("--output", help="JSON file, results/load_api-<commit>.json")
+    args = parser.parse_args()
+    result = run(args)
+    output = args.output or default_output("load_api")
+    write_json(result, output)
+
+    results = result["results"]
+    print(
+        f"{results['requests']} requests in {results['duration_s']:.1f}s "
+        f"({results['throughput_rps']:.1f} req/s, {results['errors']} errors)"
+    )
+    for operation, stats in results["operations"].items():
+        if stats["count"]:
+            print(
+                f"{operation:>6}: p50 {stats['p50_ms']:.0f}ms, "
+                f"p95 {stats['p95_ms']:.0f}ms, p99 {stats['p99_ms']:.0f}ms"
+            )
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Measure the speed-up of the process-pool tokenizer backend against core count."""
+import argparse
+import os
+
+from ._common import novel_lines, setup_django, timeit
+
+
+def run(n_lines: int, repeat: int, max_workers: int, batch_size: int):
+    from django.conf import settings
+
+    from src.services.tokenizer.states import DefaultTokenizer
+    from src.services.tokenizer.pool import ProcessPoolTokenizer
+
+    lines = novel_lines(n_lines)
+    serial, expected = timeit(lambda: DefaultTokenizer.tokenize_many(lines), repeat)
+    result = {"lines": len(lines), "serial_sec": serial, "workers": {}}
+
+    n_workers = 1
+    while n_workers <= max_workers:
+        pool = ProcessPoolTokenizer(
+            settings.TOKENIZER_CLASS,
+            max_workers=n_workers,
+            batch_size=batch_size,
+            min_lines=0,
+        )
+        # Warm the pool up so process start-up is not part of the measurement.
+        pool.tokenize_many(lines[: batch_size * n_workers])
+        elapsed, actual = timeit(lambda: pool.tokenize_many(lines), repeat)
+        pool.shutdown()
+        assert actual == expected
+        result["workers"][n_workers] = {
+            "sec": elapsed,
+            "speedup": serial / elapsed,
+        }
+        n_workers *= 2
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count())
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+    setup_django()
+    result = run(args.lines, args.repeat, args.max_workers, args.batch_size)
+    print(f"{result['lines']} lines: serial {result['serial_sec']:.2f}s")
+    for n_workers, stats in result["workers"].items():
+        print(
+            f"  {n_workers:>2} workers: {stats['sec']:.2f}s "
+            f"({stats['speedup']:.2f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Compare per-token `to_html` rendering with the fragment-caching `HtmlRenderer`."""
+import argparse
+
+from ._common import novel_lines, setup_django, timeit
+
+
+def run(n_lines: int, repeat: int):
+    from src.services.tokenizer.states import DefaultTokenizer
+    from src.services.tokenizer.html import HtmlRenderer
+
+    line_tokens = DefaultTokenizer.tokenize_many(novel_lines(n_lines))
+    renderer = HtmlRenderer()
+
+    def per_token():
+        html_lines = []
+        for tokens in line_tokens:
+            html = [tkn.to_html() for tkn in tokens]
+            html_lines.append("".join(html))
+        return "<br>".join(html_lines)
+
+    def cached():
+        return renderer.render_document(line_tokens)
+
+    before, expected = timeit(per_token, repeat)
+    after, actual = timeit(cached, repeat)
+    assert expected == actual
+    n_tokens = sum(len(tokens) for tokens in line_tokens)
+    return {
+        "lines": len(line_tokens),
+        "tokens": n_tokens,
+        "per_token_tokens_per_sec": n_tokens / before,
+        "cached_tokens_per_sec": n_tokens / after,
+        "speedup": before / after,
+        "fragments": len(renderer._fragments),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    setup_django()
+    result = run(args.lines, args.repeat)
+    print(
+        f"{result['lines']} lines, {result['tokens']} tokens: "
+        f"to_html {result['per_token_tokens_per_sec']:.0f} tokens/s, "
+        f"renderer {result['cached_tokens_per_sec']:.0f} tokens/s "
+        f"({result['speedup']:.2f}x, {result['fragments']} fragments)"
+    )
+
+
+if __name__ == "__main__":
+    main()
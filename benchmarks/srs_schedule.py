@@ -0,0 +1,71 @@
+"""Compare the recursive SM-2 interval with the memoized and vectorized schedulers."""
+import argparse
+import math
+import random
+
+from ._common import timeit
+
+
+def recursive_interval(iteration: int, easiness_factor: float) -> int:
+    # The original implementation, kept as the reference.
+    if iteration == 1:
+        return 1
+    elif iteration == 2:
+        return 6
+    return math.ceil(
+        recursive_interval(iteration - 1, easiness_factor) * easiness_factor
+    )
+
+
+def run(n_cards: int, max_iteration: int, repeat: int, seed: int = 0):
+    from src.apps.jidou_hikki.utils.srs import (
+        MAX_INTERVAL,
+        calc_repetition_interval,
+        calc_repetition_intervals,
+    )
+
+    rng = random.Random(seed)
+    iterations = [rng.randint(1, max_iteration) for _ in range(n_cards)]
+    efs = [round(rng.uniform(1.3, 2.5), 2) for _ in range(n_cards)]
+    cards = list(zip(iterations, efs))
+
+    def recursive():
+        return [min(recursive_interval(i, ef), MAX_INTERVAL) for i, ef in cards]
+
+    def memoized():
+        calc_repetition_interval.cache_clear()
+        return [calc_repetition_interval(i, ef) for i, ef in cards]
+
+    def vectorized():
+        return calc_repetition_intervals(iterations, efs).tolist()
+
+    recursive_time, expected = timeit(recursive, repeat)
+    memoized_time, memoized_result = timeit(memoized, repeat)
+    vectorized_time, vectorized_result = timeit(vectorized, repeat)
+    assert expected == memoized_result == vectorized_result
+    return {
+        "cards": n_cards,
+        "max_iteration": max_iteration,
+        "recursive_sec": recursive_time,
+        "memoized_sec": memoized_time,
+        "vectorized_sec": vectorized_time,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cards", type=int, default=50000)
+    parser.add_argument("--max-iteration", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    result = run(args.cards, args.max_iteration, args.repeat)
+    print(
+        f"{result['cards']} cards (iteration <= {result['max_iteration']}): "
+        f"recursive {result['recursive_sec'] * 1000:.1f}ms, "
+        f"memoized {result['memoized_sec'] * 1000:.1f}ms, "
+        f"vectorized {result['vectorized_sec'] * 1000:.1f}ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""Micro-benchmarks of the tokenizer pipeline over small, medium and novel-sized corpora.
+
+Covers `tokenize_text`, `_parse_kanji_furigana_okurigana`, the JMdict lookups and
+`Notebook._parse_html_and_tokens`, and writes the results with the environment they
+ran in as JSON, e.g.
+
+    python -m benchmarks.suite --corpus small medium
+    python -m benchmarks.compare benchmarks/results/suite-<old>.json \\
+        benchmarks/results/suite-<new>.json
+"""
+import argparse
+from typing import Callable, Dict, List
+
+from ._common import (
+    default_output,
+    environment,
+    novel_lines,
+    setup_django,
+    time_runs,
+    write_json,
+)
+
+CORPORA = {"small": 100, "medium": 2000, "novel": 20000}
+
+
+def bench_tokenize_text(lines: List[str], repeat: int) -> Dict:
+    from src.services.tokenizer.states import DefaultTokenizer
+
+    lines = [line for line in lines if line]
+
+    def tokenize():
+        return [DefaultTokenizer.tokenize_text(line) for line in lines]
+
+    timing, line_tokens = time_runs(tokenize, repeat)
+    n_tokens = sum(len(tokens) for tokens in line_tokens)
+    return {
+        **timing,
+        "lines": len(lines),
+        "tokens": n_tokens,
+        "lines_per_sec": len(lines) / timing["best_s"],
+        "tokens_per_sec": n_tokens / timing["best_s"],
+    }
+
+
+def bench_parse_kanji_furigana_okurigana(lines: List[str], repeat: int) -> Dict:
+    from src.services.tokenizer.states import DefaultTokenizer
+
+    if not hasattr(DefaultTokenizer, "_parse_kanji_furigana_okurigana"):
+        return {"skipped": f"{DefaultTokenizer.__name__} works on Sudachi morphemes"}
+    from src.services.tokenizer.sudachi import SudachiSplitMode
+
+    session = DefaultTokenizer._session()
+    morphemes = [
+        morpheme
+        for line in lines
+        if line
+        for morpheme in session.tokenize(line, SudachiSplitMode.MODE_C)
+    ]
+    parse = DefaultTokenizer._parse_kanji_furigana_okurigana
+
+    def parse_all():
+        return [parse(morpheme) for morpheme in morphemes]
+
+    timing, _ = time_runs(parse_all, repeat)
+    return {
+        **timing,
+        "morphemes": len(morphemes),
+        "morphemes_per_sec": len(morphemes) / timing["best_s"],
+    }
+
+
+def bench_jamdict_lookup(lines: List[str], repeat: int) -> Dict:
+    """Uncached lookups of the distinct words, then cached lookups of every word."""
+    from src.services.dictionary.cache import get_lookup_cache
+    from src.services.dictionary.jamdict import JamdictJisho
+    from src.services.tokenizer.states import DefaultTokenizer
+
+    words = [
+        token.normalized_form
+        for tokens in DefaultTokenizer.tokenize_many([line for line in lines if line])
+        for token in tokens
+        if token.contains_kanji
+    ]
+    distinct_words = list(dict.fromkeys(words))
+    lookup = JamdictJisho.lookup.__wrapped__
+
+    def uncached():
+        return [lookup(JamdictJisho, word) for word in distinct_words]
+
+    def cached():
+        return [JamdictJisho.lookup(word) for word in words]
+
+    uncached_timing, _ = time_runs(uncached, repeat)
+    get_lookup_cache().clear()
+    cached_timing, _ = time_runs(cached, repeat)
+    return {
+        "words": len(words),
+        "distinct_words": len(distinct_words),
+        "uncached_best_s": uncached_timing["best_s"],
+        "uncached_median_s": uncached_timing["median_s"],
+        "uncached_lookups_per_sec": len(distinct_words) / uncached_timing["best_s"],
+        "cached_best_s": cached_timing["best_s"],
+        "cached_median_s": cached_timing["median_s"],
+        "cached_lookups_per_sec": len(words) / cached_timing["best_s"],
+    }
+
+
+def bench_parse_html_and_tokens(lines: List[str], repeat: int) -> Dict:
+    from src.apps.notebook.models import Notebook
+
+    notebook = Notebook(title="benchmark")
+
+    def parse():
+        return notebook._parse_html_and_tokens(lines)
+
+    timing, (html_lines, _) = time_runs(parse, repeat)
+    return {
+        **timing,
+        "lines": len(lines),
+        "html_bytes": sum(len(html.encode("utf-8")) for html in html_lines),
+        "lines_per_sec": len(lines) / timing["best_s"],
+    }
+
+
+BENCHMARKS: Dict[str, Callable[[List[str], int], Dict]] = {
+    "tokenize_text": bench_tokenize_text,
+    "parse_kanji_furigana_okurigana": bench_parse_kanji_furigana_okurigana,
+    "jamdict_lookup": bench_jamdict_lookup,
+    "parse_html_and_tokens": bench_parse_html_and_tokens,
+}
+
+
+def run(corpora: List[str], benchmarks: List[str], repeat: int) -> Dict:
+    results = {}
+    for name in benchmarks:
+        results[name] = {}
+        for corpus in corpora:
+            lines = novel_lines(CORPORA[corpus])
+            results[name][corpus] = BENCHMARKS[name](lines, repeat)
+    return {
+        "environment": environment(),
+        "parameters": {
+            "repeat": repeat,
+            "corpora": {corpus: CORPORA[corpus] for corpus in corpora},
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--corpus", nargs="+", choices=list(CORPORA), default=list(CORPORA)
+    )
+    parser.add_argument(
+        "--benchmark", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS)
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="JSON file, results/suite-<commit>.json")
+    args = parser.parse_args()
+    setup_django()
+    result = run(args.corpus, args.benchmark, args.repeat)
+    output = args.output or default_output("suite")
+    write_json(result, output)
+    for name, by_corpus in result["results"].items():
+        for corpus, stats in by_corpus.items():
+            if "skipped" in stats:
+                print(f"{name} [{corpus}]: skipped ({stats['skipped']})")
+                continue
+            rates = ", ".join(
+                f"{key} {value:.0f}"
+                for key, value in stats.items()
+                if key.endswith("_per_sec")
+            )
+            print(f"{name} [{corpus}]: {rates}")
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Measure the morpheme -> Token cache on a repetitive, novel-sized document."""
+import argparse
+
+from ._common import novel_lines, setup_django, timeit
+
+
+def run(n_lines: int, repeat: int):
+    from src.services.tokenizer.sudachi import SudachiTokenizer
+
+    lines = [line.strip() for line in novel_lines(n_lines) if line]
+    cache = SudachiTokenizer.token_cache()
+    maxsize = cache.maxsize
+
+    def tokenize():
+        return SudachiTokenizer.tokenize_many(lines)
+
+    cache.maxsize = 0
+    cache.clear()
+    uncached, _ = timeit(tokenize, repeat)
+
+    cache.maxsize = maxsize
+    cache.clear()
+    cached, _ = timeit(tokenize, repeat)
+    return {
+        "lines": len(lines),
+        "uncached_lines_per_sec": len(lines) / uncached,
+        "cached_lines_per_sec": len(lines) / cached,
+        "speedup": uncached / cached,
+        "cache": cache.stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    setup_django()
+    result = run(args.lines, args.repeat)
+    print(
+        f"{result['lines']} lines: "
+        f"uncached {result['uncached_lines_per_sec']:.0f} lines/s, "
+        f"cached {result['cached_lines_per_sec']:.0f} lines/s "
+        f"({result['speedup']:.2f}x), cache {result['cache']}"
+    )
+
+
+if __name__ == "__main__":
+    main()
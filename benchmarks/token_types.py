@@ -0,0 +1,64 @@
+"""Compare memory and construction throughput of `Token` and `CompactToken`.
+
+The document is tokenized once; the benchmark then rebuilds every token as each
+type from the same field values, so the numbers isolate the token representation
+from Sudachi itself.
+"""
+import argparse
+import time
+import tracemalloc
+
+from ._common import novel_text, setup_django
+
+
+def _measure(build, rows):
+    tracemalloc.start()
+    start = time.perf_counter()
+    tokens = [build(row) for row in rows]
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return tokens, elapsed, current
+
+
+def run(n_bytes: int):
+    from src.services.tokenizer.states import DefaultTokenizer
+    from src.services.tokenizer.schemas import CompactToken, Token
+
+    text = novel_text(n_bytes)
+    lines = [line.strip() for line in text.split("\n") if line]
+    rows = [
+        tuple(tkn) for tokens in DefaultTokenizer.tokenize_many(lines) for tkn in tokens
+    ]
+
+    fields = CompactToken._fields
+    results = {"bytes": len(text.encode("utf-8")), "tokens": len(rows)}
+    for name, build in [
+        ("pydantic", lambda row: Token(**dict(zip(fields, row)))),
+        ("compact", lambda row: CompactToken(*row)),
+    ]:
+        tokens, elapsed, memory = _measure(build, rows)
+        results[name] = {
+            "tokens_per_sec": len(tokens) / elapsed,
+            "bytes_per_token": memory / len(tokens),
+        }
+        del tokens
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--bytes", type=int, default=1_000_000)
+    args = parser.parse_args()
+    setup_django()
+    result = run(args.bytes)
+    print(f"{result['bytes']} bytes, {result['tokens']} tokens")
+    for name in ("pydantic", "compact"):
+        print(
+            f"  {name:>8}: {result[name]['tokens_per_sec']:.0f} tokens/s, "
+            f"{result[name]['bytes_per_token']:.0f} bytes/token"
+        )
+
+
+if __name__ == "__main__":
+    main()
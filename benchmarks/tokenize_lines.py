@@ -0,0 +1,47 @@
+"""Compare per-line `tokenize_text` calls with the batch `tokenize_many` API."""
+import argparse
+
+from ._common import novel_lines, setup_django, timeit
+
+
+def run(n_lines: int, repeat: int):
+    from src.services.tokenizer.states import DefaultTokenizer
+
+    lines = [line.strip() for line in novel_lines(n_lines) if line]
+
+    def per_line():
+        return [DefaultTokenizer.tokenize_text(line) for line in lines]
+
+    def batch():
+        return DefaultTokenizer.tokenize_many(lines)
+
+    before, expected = timeit(per_line, repeat)
+    after, actual = timeit(batch, repeat)
+    assert [[t.word_id for t in ln] for ln in expected] == [
+        [t.word_id for t in ln] for ln in actual
+    ]
+    return {
+        "lines": len(lines),
+        "per_line_lines_per_sec": len(lines) / before,
+        "batch_lines_per_sec": len(lines) / after,
+        "speedup": before / after,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    setup_django()
+    result = run(args.lines, args.repeat)
+    print(
+        f"{result['lines']} lines: "
+        f"per-line {result['per_line_lines_per_sec']:.0f} lines/s, "
+        f"batch {result['batch_lines_per_sec']:.0f} lines/s "
+        f"({result['speedup']:.2f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
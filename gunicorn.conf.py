@@ -0,0 +1,45 @@
+"""Gunicorn configuration, used by the Procfile (`gunicorn -c gunicorn.conf.py`).
+
+With `GUNICORN_PRELOAD=true` (the default) the app and its dictionaries are loaded
+once in the master and shared copy-on-write by the workers. Each worker logs its boot
+time and memory on start, so both modes can be compared.
+"""
+import gc
+import os
+import time
+
+# GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker serves the ASGI app instead,
+# which is what the async notebook endpoints are meant for.
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "sync")
+wsgi_app = "src.asgi:application" if "uvicorn" in worker_class else "src.wsgi"
+workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() == "true"
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+    from src.services.preload import preload_services
+
+    preload_services()
+    # Move everything allocated so far out of the collector's reach, so that garbage
+    # collection in the workers does not touch (and un-share) the preloaded pages.
+    gc.freeze()
+
+
+def pre_fork(server, worker):
+    worker.boot_started = time.monotonic()
+
+
+def post_worker_init(worker):
+    from src.services.logging import logger
+    from src.services.preload import preload_services, process_memory
+
+    if not preload_app:
+        preload_services()
+    boot_time = time.monotonic() - worker.boot_started
+    memory = ", ".join(f"{k}={v}kB" for k, v in process_memory().items())
+    logger.info(
+        f"Worker {worker.pid} booted in {boot_time:.2f}s "
+        f"(preload_app={preload_app}): {memory}"
+    )
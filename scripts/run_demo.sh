@@ -1 +1 @@
-gunicorn src.wsgi --bind 0.0.0.0:8000 --workers 4 --env DEMO_ONLY=true
\ No newline at end of file
+gunicorn src.wsgi --bind 0.0.0.0:8000 --workers 4 --env DEMO_ONLY=true --env NOTEBOOK_ASYNC_PARSING=false
\ No newline at end of file
@@ -0,0 +1,30 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from src.services.dictionary.index import write_index
+from src.services.dictionary.jamdict import JamdictJisho
+
+
+class Command(BaseCommand):
+    help = (
+        "Compile Jamdict's JMdict database into the compact index read by "
+        "`CompactJisho` (enable it with JISHO_CLASS)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            default=settings.JMDICT_INDEX_PATH,
+            help="Index file to write (default: JMDICT_INDEX_PATH).",
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        stats = write_index(options["output"], JamdictJisho.iter_entries())
+        self.stdout.write(
+            f"Wrote {stats['entries']} entries and {stats['keys']} keys "
+            f"({stats['bytes'] / 2**20:.1f} MiB) to {options['output']} "
+            f"in {time.perf_counter() - start:.1f}s."
+        )
@@ -0,0 +1,68 @@
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Report the slowest imports of a fresh `django.setup()` followed by importing "
+        "the given modules, using `python -X importtime`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "modules",
+            nargs="*",
+            help="Modules to import after django.setup() (default: ROOT_URLCONF).",
+        )
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=20,
+            help="Number of imports to list, slowest cumulative time first.",
+        )
+        parser.add_argument(
+            "--max-ms",
+            type=float,
+            default=None,
+            help="Fail if the total import time exceeds this many milliseconds.",
+        )
+
+    def handle(self, *args, **options):
+        modules = options["modules"] or [settings.ROOT_URLCONF]
+        code = "import django; django.setup()\n" + "".join(
+            f"import {module}\n" for module in modules
+        )
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            raise CommandError(result.stderr)
+
+        imports = []
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "[us]" in line:
+                continue
+            self_us, cumulative_us, name = line.split(":", 1)[1].split("|")
+            # Nested imports are indented by two spaces per level.
+            imports.append((int(cumulative_us), int(self_us), name[1:].rstrip()))
+        # Top-level imports are the ones not indented under another import.
+        total_us = sum(
+            cumulative for cumulative, _, name in imports if not name.startswith("  ")
+        )
+
+        self.stdout.write(f"{'cumulative':>12} {'self':>10}  module")
+        for cumulative, own, name in sorted(imports, reverse=True)[: options["top"]]:
+            self.stdout.write(
+                f"{cumulative / 1000:>10.1f}ms {own / 1000:>8.1f}ms  {name.strip()}"
+            )
+        self.stdout.write(f"Total import time: {total_us / 1000:.1f}ms")
+
+        if options["max_ms"] is not None and total_us / 1000 > options["max_ms"]:
+            raise CommandError(
+                f"Import time {total_us / 1000:.1f}ms exceeds {options['max_ms']}ms."
+            )
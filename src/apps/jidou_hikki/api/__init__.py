@@ -0,0 +1 @@
+from .reviews import router
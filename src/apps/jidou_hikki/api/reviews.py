@@ -0,0 +1,116 @@
+"""Flashcard review endpoints of the legacy `jidou_hikki` app.
+
+The app is not in `INSTALLED_APPS` and ships no migrations, so this router is not
+mounted by `src.urls`; it is library code for deployments that install the app.
+"""
+import base64
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from ninja import Field, Router, ModelSchema, Query, Schema
+from ninja.errors import HttpError
+
+from src.apps.jidou_hikki.models import UserFlashCard
+
+MAX_PAGE_SIZE = 200
+
+# Schema definitions
+class FlashCardSchema(ModelSchema):
+    word: str
+
+    class Config:
+        model = UserFlashCard
+        model_fields = [
+            "id",
+            "mastery",
+            "last_review_time",
+            "next_review_time",
+            "easiness_factor",
+            "review_iteration",
+        ]
+
+    @staticmethod
+    def resolve_word(obj):
+        return obj.vocabulary.word
+
+
+class ReviewSchema(Schema):
+    card_id: int
+    answer_quality: int
+    reviewed_at: Optional[datetime] = None
+
+
+class SubmitReviewsSchema(Schema):
+    reviews: List[ReviewSchema]
+    limit: int = Field(50, ge=1, le=MAX_PAGE_SIZE)
+
+
+class DueCardsSchema(Schema):
+    items: List[FlashCardSchema]
+    next: Optional[str] = None
+
+
+# Routes
+router = Router()
+
+
+@router.post("/", response=List[FlashCardSchema])
+def submit_reviews(request, data: SubmitReviewsSchema):
+    """Apply a whole review session at once and return the next due cards."""
+    try:
+        UserFlashCard.objects.submit_reviews(
+            request.user,
+            [
+                (review.card_id, review.answer_quality, review.reviewed_at)
+                for review in data.reviews
+            ],
+        )
+    except UserFlashCard.DoesNotExist as e:
+        raise HttpError(404, str(e))
+    except ValueError as e:
+        raise HttpError(400, str(e))
+    return UserFlashCard.objects.get_due_cards(request.user).select_related(
+        "vocabulary"
+    )[: data.limit]
+
+
+def _encode_cursor(card: UserFlashCard) -> str:
+    position = f"{card.next_review_time.isoformat()}|{card.id}"
+    return base64.urlsafe_b64encode(position.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Inverse of `_encode_cursor`; raises ValueError on malformed cursors."""
+    padded = cursor + "=" * (-len(cursor) % 4)
+    position = base64.urlsafe_b64decode(padded.encode()).decode()
+    after_time, after_id = position.rsplit("|", 1)
+    return datetime.fromisoformat(after_time), int(after_id)
+
+
+@router.get("/due", response=DueCardsSchema)
+def list_due_cards(
+    request,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str = None,
+):
+    """Page through the due queue.
+
+    Pass the `next` cursor of a page to get the following one. The cursor is an
+    opaque URL-safe token that keeps the full precision of `next_review_time`,
+    which the JSON dates of the cards do not.
+    """
+    after = None
+    if cursor:
+        try:
+            after = _decode_cursor(cursor)
+        except ValueError:
+            raise HttpError(400, "Invalid cursor.")
+    cards = list(
+        UserFlashCard.objects.get_due_cards(
+            request.user, limit=limit, after=after
+        ).select_related("vocabulary")
+    )
+    next_cursor = None
+    if cards and len(cards) == limit:
+        next_cursor = _encode_cursor(cards[-1])
+    return {"items": cards, "next": next_cursor}
@@ -4,6 +4,7 @@ from model_utils.models import TimeStampedModel
 
 from .vocabulary import Vocabulary, UserFlashCard
 from src.services.tokenizer.states import DefaultTokenizer
+from src.services.tokenizer.html import get_renderer
 
 _User = get_user_model()
 
@@ -35,25 +36,28 @@ class NotePage(TimeStampedModel):
 
     @transaction.atomic
     def analyze(self):
-        lines = self.text.split("\n")
-        html_lines = []
-        vocabularies = []
-        for line in lines:
-            if line:
-                tokens = DefaultTokenizer.tokenize_text(line.strip())
-                for tkn in tokens:
-                    if tkn.contains_kanji():
-                        vocabs = Vocabulary.objects.update_or_create_from_token(tkn)
-                        for vocab in vocabs:
-                            UserFlashCard.objects.get_or_create(
-                                owner=self.notebook.owner, vocabulary=vocab
-                            )
-                        vocabularies += vocabs
-                html = [tkn.as_html() for tkn in tokens]
-                html_lines.append("".join(html))
-        self.html = "<br>".join(html_lines)
+        lines = [line.strip() for line in self.text.split("\n") if line]
+        line_tokens = DefaultTokenizer.tokenize_many(lines)
+        token_vocabs = Vocabulary.objects.update_or_create_from_tokens(
+            tkn for tokens in line_tokens for tkn in tokens if tkn.contains_kanji
+        )
+        vocabularies = {
+            vocab.id: vocab
+            for tokens in line_tokens
+            for tkn in tokens
+            if tkn.contains_kanji
+            for vocab in token_vocabs[tkn.word_id]
+        }
+        UserFlashCard.objects.bulk_create(
+            [
+                UserFlashCard(owner=self.notebook.owner, vocabulary=vocab)
+                for vocab in vocabularies.values()
+            ],
+            ignore_conflicts=True,
+        )
+        self.html = get_renderer().render_document(line_tokens)
         self.save()
-        self.vocabularies.set(vocabularies)
+        self.vocabularies.set(vocabularies.values())
 
 
 class Notebook(TimeStampedModel):
@@ -1,11 +1,11 @@
-import math
 import logging
-from typing import List
-from datetime import timedelta
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import datetime, timedelta
 
-import jamdict
-from jamdict import Jamdict
-from django.db import models
+import numpy as np
+from django.conf import settings
+from django.db import models, transaction
 from django.db.models.query import QuerySet
 from django.utils import timezone
 from django.contrib.auth.models import AbstractUser
@@ -13,9 +13,19 @@ from model_utils.models import TimeStampedModel
 from model_utils.choices import Choices
 from django.contrib.auth import get_user_model
 
-from src.services.tokenizer import DefaultTokenizer
+from src.services.tokenizer.states import DefaultTokenizer
 from src.services.tokenizer.base import Token
-from src.services.dictionary import DefaultJisho
+from src.services.dictionary.states import DefaultJisho
+from src.services.cache import LRUCache
+from src.services.dictionary.schemas import Entry
+from ..utils.deck import vocab_html, word_token_id
+from ..utils.srs import (
+    MAX_EASINESS_FACTOR,
+    calc_repetition_interval,
+    calc_repetition_intervals,
+    calc_new_easiness_factor,
+    replay_reviews,
+)
 
 logger = logging.getLogger("root")
 _User = get_user_model()
@@ -23,26 +33,6 @@ _User = get_user_model()
 MASTERY = Choices("new", "learning", "acquired")
 
 
-def calc_repetition_interval(iteration: int, easiness_factor: float) -> int:
-    if iteration == 1:
-        return 1
-    elif iteration == 2:
-        return 6
-    else:
-        return math.ceil(
-            calc_repetition_interval(iteration - 1, easiness_factor) * easiness_factor
-        )
-
-
-def calc_new_easiness_factor(old_ef: float, ans_quality: int) -> float:
-    ef = old_ef - 0.8 + 0.28 * ans_quality - 0.02 * ans_quality
-    if ef < 1.3:
-        ef = 1.3
-    elif ef > 2.5:
-        ef = 2.5
-    return ef
-
-
 class UserFlashCardManager(models.Manager):
     def get_new_cards(self, owner: AbstractUser, limit: int = None) -> QuerySet:
         """Query UserFlashCard with `new` mastery level, ordered by the created time.
@@ -55,6 +45,40 @@ class UserFlashCardManager(models.Manager):
             return queryset[:limit]
         return queryset
 
+    def get_due_cards(
+        self,
+        owner: AbstractUser,
+        now: datetime = None,
+        limit: int = None,
+        after: Tuple[datetime, int] = None,
+    ) -> QuerySet:
+        """Query `learning` cards whose next review is due, earliest first.
+
+        The queue is ordered by (next_review_time, id) and paginated by keyset, so
+        every page is a range scan of the (owner, mastery, next_review_time, id)
+        index no matter how deep into the queue it is.
+
+        :param owner: Reference to the cards owner.
+        :param now: Cards scheduled after this time are not due. Defaults to now.
+        :param limit: How many cards to be returned.
+        :param after: (next_review_time, id) of the last card of the previous page.
+        """
+        queryset = self.filter(
+            owner=owner,
+            mastery=MASTERY.learning,
+            next_review_time__lte=now or timezone.now(),
+        )
+        if after:
+            after_time, after_id = after
+            queryset = queryset.filter(
+                models.Q(next_review_time__gt=after_time)
+                | models.Q(next_review_time=after_time, id__gt=after_id)
+            )
+        queryset = queryset.order_by("next_review_time", "id")
+        if limit:
+            return queryset[:limit]
+        return queryset
+
     def get_learning_cards(self, owner: AbstractUser, limit: int = None) -> QuerySet:
         """Query UserFlashCard with `learning` mastery level, ordered by the earliest next review schedule.
 
@@ -81,6 +105,135 @@ class UserFlashCardManager(models.Manager):
             return queryset[:limit]
         return queryset
 
+    _REVIEW_FIELDS = [
+        "mastery",
+        "review_iteration",
+        "easiness_factor",
+        "last_review_time",
+        "next_review_time",
+        "modified",
+    ]
+
+    def submit_reviews(
+        self,
+        owner: AbstractUser,
+        reviews: Iterable[Tuple[int, int, Optional[datetime]]],
+    ) -> List["UserFlashCard"]:
+        """Apply a batch of reviews and save the cards in a single transaction.
+
+        Equivalent to calling `update_review_stats` for every review in order, but
+        the SM-2 state of all cards is computed with NumPy and written back in bulk.
+        A card reviewed several times in the batch (e.g. in an offline session) is
+        advanced once per review, in order.
+
+        :param owner: Reference to the cards owner.
+        :param reviews: (card_id, answer_quality, reviewed_at) tuples. A missing
+            `reviewed_at` means the review happens now.
+        :return: The updated cards.
+        """
+        reviews = list(reviews)
+        card_ids = [card_id for card_id, _, _ in reviews]
+        with transaction.atomic():
+            cards = self.select_for_update().filter(owner=owner).in_bulk(card_ids)
+            missing = set(card_ids) - cards.keys()
+            if missing:
+                raise self.model.DoesNotExist(
+                    f"Unknown cards: {', '.join(map(str, sorted(missing)))}."
+                )
+            return self._apply_reviews(
+                list(cards.values()),
+                card_ids,
+                [quality for _, quality, _ in reviews],
+                [reviewed_at for _, _, reviewed_at in reviews],
+            )
+
+    def replay_reviews(
+        self,
+        owner: AbstractUser,
+        card_ids: Iterable[int],
+        answer_qualities: Iterable[int],
+        reviewed_at: Iterable[Optional[datetime]],
+        reset: bool = False,
+        batch_size: int = 1000,
+    ) -> List["UserFlashCard"]:
+        """Recompute the SM-2 state of all of a user's cards from review events.
+
+        Used to replay a review history, e.g. after tuning the easiness factor bounds
+        or when importing reviews from another SRS. The cards are loaded as columns,
+        the events are applied with `utils.srs.replay_reviews` and the results are
+        written back in bulk.
+
+        :param owner: Reference to the cards owner.
+        :param card_ids: Card of each event.
+        :param answer_qualities: Answer quality of each event.
+        :param reviewed_at: Time of each event; None means now.
+        :param reset: Start every card from a fresh `new` state instead of its
+            current one. Cards without events are reset as well.
+        :return: The updated cards.
+        """
+        with transaction.atomic():
+            cards = list(
+                self.select_for_update()
+                .filter(owner=owner)
+                .only("id", *self._REVIEW_FIELDS)
+                .order_by("id")
+            )
+            if reset:
+                for card in cards:
+                    card.mastery = MASTERY.new
+                    card.review_iteration = 1
+                    card.easiness_factor = MAX_EASINESS_FACTOR
+                    card.last_review_time = None
+                    card.next_review_time = None
+            return self._apply_reviews(
+                cards,
+                card_ids,
+                answer_qualities,
+                reviewed_at,
+                update_all=reset,
+                batch_size=batch_size,
+            )
+
+    def _apply_reviews(
+        self,
+        cards: List["UserFlashCard"],
+        card_ids: Iterable[int],
+        answer_qualities: Iterable[int],
+        reviewed_at: Iterable[Optional[datetime]],
+        update_all: bool = False,
+        batch_size: int = 1000,
+    ) -> List["UserFlashCard"]:
+        now = timezone.now()
+        positions = {card.id: i for i, card in enumerate(cards)}
+        try:
+            card_index = np.array([positions[card_id] for card_id in card_ids])
+        except KeyError as e:
+            raise self.model.DoesNotExist(f"Unknown cards: {e.args[0]}.")
+        reviewed_at = list(reviewed_at)
+        iterations, efs, last_event = replay_reviews(
+            [card.review_iteration for card in cards],
+            [card.easiness_factor for card in cards],
+            card_index,
+            np.fromiter(answer_qualities, dtype=np.int64, count=len(card_index)),
+        )
+
+        reviewed = np.flatnonzero(last_event >= 0)
+        intervals = calc_repetition_intervals(iterations[reviewed], efs[reviewed])
+        for position, interval in zip(reviewed.tolist(), intervals.tolist()):
+            card = cards[position]
+            reviewed_time = reviewed_at[last_event[position]] or now
+            if card.mastery == MASTERY.new:
+                card.mastery = MASTERY.learning
+            card.review_iteration = int(iterations[position])
+            card.easiness_factor = float(efs[position])
+            card.last_review_time = reviewed_time
+            card.next_review_time = reviewed_time + timedelta(days=interval)
+        updated = cards if update_all else [cards[i] for i in reviewed.tolist()]
+        for card in updated:
+            card.modified = now
+        self.bulk_update(updated, self._REVIEW_FIELDS, batch_size=batch_size)
+        return updated
+
 
 class UserFlashCard(TimeStampedModel):
     objects = UserFlashCardManager()
@@ -94,14 +247,22 @@ class UserFlashCard(TimeStampedModel):
     review_iteration = models.IntegerField(default=1)
 
     class Meta:
-        unique_together = ("user", "vocabulary")
+        unique_together = ("owner", "vocabulary")
+        ordering = ["vocabulary__dict_id"]
+        indexes = [
+            models.Index(
+                fields=["owner", "mastery", "next_review_time", "id"],
+                name="flashcard_due_queue_idx",
+            ),
+            models.Index(
+                fields=["owner", "mastery", "last_review_time"],
+                name="flashcard_last_review_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"({self.owner.username}: {self.mastery}) {self.vocabulary}"
 
-    class Meta:
-        ordering = ["vocabulary__dict_id"]
-
     def update_review_stats(self, answer_quality: int) -> None:
         """
         Update repetition_interval and easiness_factor after a review.
@@ -139,40 +300,157 @@ class TokenIndex(TimeStampedModel):
         return self.token_id
 
 
+_token_index_cache: Optional[LRUCache] = None
+_token_index_cache_lock = threading.Lock()
+
+
+def get_token_index_cache() -> LRUCache:
+    """Per-process token_id -> vocabulary ids cache of `TokenIndex` resolutions."""
+    global _token_index_cache
+    if _token_index_cache is None:
+        with _token_index_cache_lock:
+            if _token_index_cache is None:
+                _token_index_cache = LRUCache(maxsize=settings.TOKEN_INDEX_CACHE_SIZE)
+    return _token_index_cache
+
+
 class VocabularyManager(models.Manager):
+    def update_or_create_from_tokens(
+        self, tokens: Iterable[Token]
+    ) -> Dict[str, List["Vocabulary"]]:
+        """Bulk version of `update_or_create_from_token`, returning word_id -> vocabs.
+
+        Tokens are resolved against the per-process cache and then `TokenIndex` with
+        one query; only the misses are normalized and looked up in the dictionary,
+        with one batched lookup. New vocabularies and index rows are written with
+        `bulk_create`.
+        """
+        tokens = list({tkn.word_id: tkn for tkn in tokens}.values())
+        resolved = self._resolve_token_ids([tkn.word_id for tkn in tokens])
+        misses = [tkn for tkn in tokens if tkn.word_id not in resolved]
+        if not misses:
+            return resolved
+
+        normalized = {
+            tkn.word_id: DefaultTokenizer.normalize_token(tkn) for tkn in misses
+        }
+        normalized_tokens = list(
+            {
+                normalized_tkn.word_id: normalized_tkn
+                for tkns in normalized.values()
+                for normalized_tkn in tkns
+            }.values()
+        )
+        resolved_normalized = self._resolve_token_ids(
+            [tkn.word_id for tkn in normalized_tokens]
+        )
+        resolved_normalized.update(
+            self._create_from_normalized_tokens(
+                tkn
+                for tkn in normalized_tokens
+                if tkn.word_id not in resolved_normalized
+            )
+        )
+
+        cache = get_token_index_cache()
+        for tkn in misses:
+            vocabs = [
+                vocab
+                for normalized_tkn in normalized[tkn.word_id]
+                for vocab in resolved_normalized.get(normalized_tkn.word_id, [])
+            ]
+            if vocabs:
+                cache.set(tkn.word_id, tuple(vocab.id for vocab in vocabs))
+            resolved[tkn.word_id] = vocabs
+        return resolved
+
     def update_or_create_from_token(self, token: Token) -> List["Vocabulary"]:
-        # Check if token has been indexed before
-        vocabs = []
-        if TokenIndex.objects.filter(token_id=token.word_id).exists():
-            vocabs.append(TokenIndex.objects.get(token_id=token.word_id).vocabulary)
-        else:
-            normalized_tokens = DefaultTokenizer.normalize_token(token)
-            for normalized_tkn in normalized_tokens:
+        return self.update_or_create_from_tokens([token])[token.word_id]
+
+    def _resolve_token_ids(self, token_ids: List[str]) -> Dict[str, List["Vocabulary"]]:
+        """Vocabularies of already known token ids, from the cache or `TokenIndex`."""
+        cache = get_token_index_cache()
+        cached = {}
+        for token_id in token_ids:
+            vocab_ids = cache.get(token_id)
+            if vocab_ids is not None:
+                cached[token_id] = vocab_ids
+        vocabs = self.in_bulk({i for vocab_ids in cached.values() for i in vocab_ids})
+
+        resolved = {}
+        for token_id, vocab_ids in cached.items():
+            if all(i in vocabs for i in vocab_ids):
+                resolved[token_id] = [vocabs[i] for i in vocab_ids]
+        misses = [token_id for token_id in token_ids if token_id not in resolved]
+        if misses:
+            for index in TokenIndex.objects.filter(token_id__in=misses).select_related(
+                "vocabulary"
+            ):
+                resolved[index.token_id] = [index.vocabulary]
+                cache.set(index.token_id, (index.vocabulary_id,))
+        return resolved
+
+    def _create_from_normalized_tokens(
+        self, tokens: Iterable[Token]
+    ) -> Dict[str, List["Vocabulary"]]:
+        """Create vocabularies and `TokenIndex` rows for unindexed normalized tokens."""
+        tokens = list(tokens)
+        jmd_lookups = DefaultJisho.lookup_tokens(tokens)
+        token_dict_ids = {}
+        for tkn in tokens:
+            jmd_entries = jmd_lookups.get(tkn.normalized_form, [])
+            if len(jmd_entries) > 0:
+                # Some tokens may be a set of expressions, and not available in
+                # JMDict. Example cases:
+                #   -  キャラ作り
                 # Assume the first entry to be the best match
-                jmd_info = DefaultJisho.lookup_token(normalized_tkn)
-                if len(jmd_info.entries) > 0:
-                    # Some tokens may be a set of expressions, and not available in
-                    # JMDict. Example cases:
-                    #   -  キャラ作り
-                    jmd_entry = jmd_info.entries[0]
-                    vocab, _ = self.update_or_create(
-                        dict_id=jmd_entry.idseq,
-                        defaults={
-                            "word": normalized_tkn.word,
-                            "kanji": normalized_tkn.kanji,
-                            "furigana": normalized_tkn.furigana,
-                            "okurigana": normalized_tkn.okurigana,
-                            "reading": normalized_tkn.reading_form,
-                        },
-                    )
-                    # Index normalized token for future lookup
-                    TokenIndex.objects.update_or_create(
-                        token_id=normalized_tkn.word_id, vocabulary=vocab
-                    )
-                    vocabs.append(vocab)
-                else:
-                    logger.error(f"No JMDict entries for {normalized_tkn}.")
-        return vocabs
+                token_dict_ids[tkn.word_id] = jmd_entries[0].idseq
+            else:
+                logger.error(f"No JMDict entries for {tkn}.")
+        if not token_dict_ids:
+            return {}
+
+        def vocabs_by_dict_id():
+            return {
+                vocab.dict_id: vocab
+                for vocab in self.filter(dict_id__in=set(token_dict_ids.values()))
+            }
+
+        vocabs = vocabs_by_dict_id()
+        new_vocabs = {}
+        for tkn in tokens:
+            dict_id = token_dict_ids.get(tkn.word_id)
+            if dict_id is not None and dict_id not in vocabs:
+                new_vocabs.setdefault(
+                    dict_id,
+                    self.model(
+                        dict_id=dict_id,
+                        word=tkn.normalized_form,
+                        kanji=tkn.kanji,
+                        furigana=tkn.furigana,
+                        okurigana=tkn.okurigana,
+                        reading=tkn.reading_form,
+                    ),
+                )
+        if new_vocabs:
+            self.bulk_create(new_vocabs.values())
+            # Not every database returns the primary keys of bulk-created rows.
+            vocabs = vocabs_by_dict_id()
+
+        # Index normalized tokens for future lookup
+        TokenIndex.objects.bulk_create(
+            [
+                TokenIndex(token_id=token_id, vocabulary=vocabs[dict_id])
+                for token_id, dict_id in token_dict_ids.items()
+            ],
+            ignore_conflicts=True,
+        )
+        cache = get_token_index_cache()
+        for token_id, dict_id in token_dict_ids.items():
+            cache.set(token_id, (vocabs[dict_id].id,))
+        return {
+            token_id: [vocabs[dict_id]] for token_id, dict_id in token_dict_ids.items()
+        }
 
 
 class Vocabulary(TimeStampedModel):
@@ -190,6 +468,7 @@ class Vocabulary(TimeStampedModel):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._jmd_lookup = None
+        self._token_id = None
 
     def __str__(self):
         return f"{self.word}"
@@ -198,12 +477,19 @@ class Vocabulary(TimeStampedModel):
         token = DefaultTokenizer.tokenize_text(self.word)
         return token[0] if token else None
 
+    @property
+    def token_id(self) -> str:
+        """Word ID of the token this vocabulary was created from, as used in HTML."""
+        if self._token_id is None:
+            index = self.tokenindex_set.order_by("id").first()
+            self._token_id = index.token_id if index else word_token_id(self)
+        return self._token_id
+
     def as_html(self) -> str:
-        token = self.as_token()
-        return token.as_html() if token else ""
+        return vocab_html(self)
 
     @property
-    def jmdict(self) -> jamdict.util.LookupResult:
+    def jmdict(self) -> List[Entry]:
         if not self._jmd_lookup:
             self._jmd_lookup = DefaultJisho.lookup(f"id#{self.dict_id}")
         return self._jmd_lookup
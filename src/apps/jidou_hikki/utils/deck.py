@@ -0,0 +1,84 @@
+from typing import Dict, Iterable, List
+
+from src.services.dictionary.states import DefaultJisho
+from src.services.tokenizer.utils import write_kanji_html, write_normal_html
+
+
+def vocab_html(vocab) -> str:
+    """Furigana HTML of a (Dry)Vocabulary, rendered from its stored reading parts.
+
+    Same markup as `Token.to_html` of the token the vocabulary was made from, so
+    its `data-word-id` matches the words of the page, without tokenizing again.
+    """
+    if vocab.kanji:
+        return write_kanji_html(
+            vocab.token_id, vocab.kanji, vocab.furigana or "", vocab.okurigana or ""
+        )
+    return write_normal_html(vocab.word)
+
+
+def word_token_id(vocab) -> str:
+    """Word ID of the vocabulary's word tokenized on its own, for unindexed words."""
+    token = vocab.as_token()
+    return token.word_id if token else ""
+
+
+def prefetch_token_ids(vocabularies: Iterable) -> None:
+    """Fill the `token_id` of every saved vocabulary with one `TokenIndex` query."""
+    from ..models.vocabulary import TokenIndex
+
+    missing = {
+        vocab.pk: vocab
+        for vocab in vocabularies
+        if vocab._token_id is None and getattr(vocab, "pk", None)
+    }
+    if not missing:
+        return
+    # The first index row of a vocabulary is the token it was created from.
+    first_token_ids = dict(
+        TokenIndex.objects.filter(vocabulary_id__in=missing)
+        .order_by("-id")
+        .values_list("vocabulary_id", "token_id")
+    )
+    for vocab_id, vocab in missing.items():
+        token_id = first_token_ids.get(vocab_id)
+        vocab._token_id = token_id if token_id is not None else word_token_id(vocab)
+
+
+def prefetch_jmdict(vocabularies: Iterable) -> None:
+    """Fill the `jmdict` property of every vocabulary with one batched lookup."""
+    missing = [vocab for vocab in vocabularies if not vocab._jmd_lookup]
+    lookups = DefaultJisho.lookup_many(f"id#{vocab.dict_id}" for vocab in missing)
+    for vocab in missing:
+        vocab._jmd_lookup = lookups[f"id#{vocab.dict_id}"]
+
+
+def serialize_vocab_list(vocabularies: Iterable) -> List[Dict]:
+    """One card per JMdict entry of every vocabulary, for the deck templates.
+
+    Dictionary entries and token IDs are fetched in a single batch each and the word
+    HTML comes from the stored kanji/furigana/okurigana, so the cost does not grow
+    with the number of lookups or tokenizer calls.
+    """
+    vocabularies = list(vocabularies)
+    prefetch_jmdict(vocabularies)
+    prefetch_token_ids(vocabularies)
+    serialized_deck = []
+    for vocab in vocabularies:
+        word_html = vocab_html(vocab)
+        for entry in vocab.jmdict:
+            serialized_deck.append(
+                {
+                    "word": vocab.word,
+                    "word_html": word_html,
+                    "kana": ",".join(entry.kana_forms),
+                    "senses": [
+                        {
+                            "pos": ",".join(sense.pos),
+                            "translations": ",".join(sense.glosses),
+                        }
+                        for sense in entry.senses
+                    ],
+                }
+            )
+    return serialized_deck
@@ -1,13 +1,14 @@
 import logging
-from typing import Tuple, List
+from typing import Dict, Tuple, List
 
-import jamdict
-from jamdict import Jamdict
-
-from src.services.tokenizer import DefaultTokenizer
+from src.services.analysis import get_analysis, set_analysis
+from src.services.tokenizer.states import DefaultTokenizer
+from src.services.tokenizer.html import get_renderer
 from src.services.tokenizer.schemas import Token
 from src.services.tokenizer.sudachi import SudachiSplitMode
-from src.services.dictionary import DefaultJisho
+from src.services.dictionary.states import DefaultJisho
+from src.services.dictionary.schemas import Entry
+from .deck import vocab_html, word_token_id
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
@@ -22,13 +23,14 @@ class DryVocabulary:
     """
 
     def __init__(self, *args, **kwargs):
-        self.dict_id = kwargs.get("idseq")
+        self.dict_id = kwargs.get("dict_id")
         self.word = kwargs.get("word")
         self.kanji = kwargs.get("kanji")
         self.furigana = kwargs.get("furigana")
         self.okurigana = kwargs.get("okurigana")
-        self.reading = kwargs.get("reading_form")
+        self.reading = kwargs.get("reading")
         self._jmd_lookup = kwargs.get("jmd_lookup")
+        self._token_id = kwargs.get("token_id")
 
     def __str__(self):
         return f"{self.word}"
@@ -37,12 +39,18 @@ class DryVocabulary:
         token = DefaultTokenizer.tokenize_text(self.word)
         return token[0] if token else None
 
+    @property
+    def token_id(self) -> str:
+        """Word ID of the token this vocabulary was created from, as used in HTML."""
+        if self._token_id is None:
+            self._token_id = word_token_id(self)
+        return self._token_id
+
     def as_html(self) -> str:
-        token = self.as_token()
-        return token.as_html() if token else ""
+        return vocab_html(self)
 
     @property
-    def jmdict(self) -> jamdict.util.LookupResult:
+    def jmdict(self) -> List[Entry]:
         if not self._jmd_lookup:
             self._jmd_lookup = DefaultJisho.lookup(f"id#{self.dict_id}")
         return self._jmd_lookup
@@ -56,32 +64,47 @@ class DryVocabulary:
         return self.word
 
 
-def token_2_vocab(token) -> Tuple[List[DryVocabulary], List[str]]:
+def token_2_vocab(
+    token,
+    jmd_lookups: Dict[str, List[Entry]] = None,
+    normalized_tokens: List[Token] = None,
+) -> Tuple[List[DryVocabulary], List[str]]:
+    """Convert a token into vocabularies.
+
+    :param jmd_lookups: Entries of the normalized forms, as returned by
+        `DefaultJisho.lookup_tokens`. Missing words are looked up one by one.
+    :param normalized_tokens: Result of `normalize_token(token)`, if already known.
+    """
     vocabs = []
     failed = []
-    normalized_tokens = DefaultTokenizer.normalize_token(token)
+    if normalized_tokens is None:
+        normalized_tokens = DefaultTokenizer.normalize_token(token)
     logger.debug(f"Normalized {token} -> {normalized_tokens}")
     for normalized_tkn in normalized_tokens:
-        # Assume the first entry to be the best match
-        jmd_info = DefaultJisho.lookup_token(normalized_tkn)
-        if len(jmd_info.entries) > 0:
+        if jmd_lookups is not None and normalized_tkn.normalized_form in jmd_lookups:
+            jmd_entries = jmd_lookups[normalized_tkn.normalized_form]
+        else:
+            jmd_entries = DefaultJisho.lookup_token(normalized_tkn)
+        if len(jmd_entries) > 0:
             # Some tokens may be a set of expressions, and not available in
             # JMDict. Example cases:
             #   -  キャラ作り
-            jmd_entry = jmd_info.entries[0]
+            # Assume the first entry to be the best match
+            jmd_entry = jmd_entries[0]
             vocabs.append(
                 DryVocabulary(
                     dict_id=jmd_entry.idseq,
-                    word=normalized_tkn.word,
+                    word=normalized_tkn.normalized_form,
                     kanji=normalized_tkn.kanji,
                     furigana=normalized_tkn.furigana,
                     okurigana=normalized_tkn.okurigana,
                     reading=normalized_tkn.reading_form,
-                    jmd_lookup=jmd_info,
+                    jmd_lookup=jmd_entries,
+                    token_id=normalized_tkn.word_id,
                 )
             )
         else:
-            failed.append(normalized_tkn.word)
+            failed.append(normalized_tkn.normalized_form)
             logger.error(
                 f"Cannot process ({token} -> {normalized_tkn}) into vocabulary."
             )
@@ -89,21 +112,31 @@ def token_2_vocab(token) -> Tuple[List[DryVocabulary], List[str]]:
 
 
 def analyze_text(text: str) -> Tuple[str, List[DryVocabulary], List[str]]:
-    """Similar to NotePage.analyze(), but returns the HTML text and list of DryVocabulary."""
-    lines = text.split("\n")
-    html_lines = []
+    """Similar to NotePage.analyze(), but returns the HTML text and list of DryVocabulary.
+
+    Dictionary entries of every kanji token are fetched with one batched lookup, and
+    results are kept in the analysis cache so a text pasted again is not re-analyzed.
+    """
+    cached = get_analysis("demo", text, SudachiSplitMode.MODE_B)
+    if cached is not None:
+        return cached
+    lines = [line.strip() for line in text.split("\n") if line]
+    line_tokens = DefaultTokenizer.tokenize_many(lines, SudachiSplitMode.MODE_B)
+    kanji_tokens = [
+        tkn for tokens in line_tokens for tkn in tokens if tkn.contains_kanji
+    ]
+    normalized_tokens = [DefaultTokenizer.normalize_token(tkn) for tkn in kanji_tokens]
+    jmd_lookups = DefaultJisho.lookup_tokens(
+        normalized_tkn for tokens in normalized_tokens for normalized_tkn in tokens
+    )
+
     vocabularies = []
     failed_analysis = []
-    for line in lines:
-        if line:
-            tokens = DefaultTokenizer.tokenize_text(
-                line.strip(), SudachiSplitMode.MODE_B
-            )
-            for tkn in tokens:
-                if tkn.contains_kanji():
-                    vocabs, failed = token_2_vocab(tkn)
-                    failed_analysis += failed
-                    vocabularies += vocabs
-            html = [tkn.as_html() for tkn in tokens]
-            html_lines.append("".join(html))
-    return "<br>".join(html_lines), vocabularies, failed_analysis
+    for tkn, normalized in zip(kanji_tokens, normalized_tokens):
+        vocabs, failed = token_2_vocab(tkn, jmd_lookups, normalized)
+        failed_analysis += failed
+        vocabularies += vocabs
+    html = get_renderer().render_document(line_tokens)
+    result = (html, vocabularies, failed_analysis)
+    set_analysis("demo", text, result, SudachiSplitMode.MODE_B)
+    return result
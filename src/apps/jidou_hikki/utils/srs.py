@@ -0,0 +1,139 @@
+"""SM-2 scheduling helpers shared by the flashcard models and bulk re-scheduling."""
+import math
+from functools import lru_cache
+from typing import Tuple
+
+import numpy as np
+
+FIRST_INTERVAL = 1
+SECOND_INTERVAL = 6
+MIN_EASINESS_FACTOR = 1.3
+MAX_EASINESS_FACTOR = 2.5
+# Intervals grow geometrically with every successful review; capping them keeps the
+# next review time within what `datetime` can represent.
+MAX_INTERVAL = 36500
+
+
+@lru_cache(maxsize=4096)
+def calc_repetition_interval(iteration: int, easiness_factor: float) -> int:
+    """Interval (in days) before the next review of a card at `iteration`.
+
+    I(1) = 1, I(2) = 6 and I(n) = ceil(I(n - 1) * EF). The rounding is applied at
+    every step, so the chain is walked iteratively instead of using EF ** (n - 2).
+    Cards share a handful of easiness factors, so results are memoized. Intervals
+    are capped at `MAX_INTERVAL` days.
+    """
+    if iteration < 1:
+        raise ValueError("Review iteration must be a positive integer.")
+    if iteration == 1:
+        return FIRST_INTERVAL
+    interval = SECOND_INTERVAL
+    for _ in range(iteration - 2):
+        interval = math.ceil(interval * easiness_factor)
+        if interval >= MAX_INTERVAL:
+            return MAX_INTERVAL
+    return interval
+
+
+def calc_new_easiness_factor(old_ef: float, ans_quality: int) -> float:
+    ef = old_ef - 0.8 + 0.28 * ans_quality - 0.02 * ans_quality
+    if ef < MIN_EASINESS_FACTOR:
+        ef = MIN_EASINESS_FACTOR
+    elif ef > MAX_EASINESS_FACTOR:
+        ef = MAX_EASINESS_FACTOR
+    return ef
+
+
+def calc_repetition_intervals(iterations, easiness_factors) -> np.ndarray:
+    """Vectorized `calc_repetition_interval` over arrays of cards.
+
+    Runs one in-place multiply per iteration level, so re-scheduling a whole deck
+    costs O(max(iterations)) NumPy passes regardless of the number of cards.
+
+    :param iterations: Array-like of review iterations (>= 1).
+    :param easiness_factors: Array-like of easiness factors, same shape.
+    :return: int64 array of intervals in days.
+    """
+    iterations = np.asarray(iterations, dtype=np.int64)
+    easiness_factors = np.asarray(easiness_factors, dtype=np.float64)
+    if iterations.shape != easiness_factors.shape:
+        raise ValueError("iterations and easiness_factors must have the same shape.")
+    if iterations.size == 0:
+        return np.zeros(iterations.shape, dtype=np.int64)
+    if iterations.min() < 1:
+        raise ValueError("Review iteration must be a positive integer.")
+
+    # Sort cards by descending iteration so that the cards still being advanced at
+    # each step form a contiguous prefix, updated in place without masking.
+    order = np.argsort(-iterations, axis=None, kind="stable")
+    sorted_iterations = iterations.ravel()[order]
+    sorted_efs = easiness_factors.ravel()[order]
+    intervals = np.where(sorted_iterations == 1, FIRST_INTERVAL, SECOND_INTERVAL)
+    intervals = intervals.astype(np.float64)
+    for step in range(3, int(sorted_iterations[0]) + 1):
+        n_active = np.count_nonzero(sorted_iterations >= step)
+        active = intervals[:n_active]
+        np.multiply(active, sorted_efs[:n_active], out=active)
+        np.ceil(active, out=active)
+        np.minimum(active, MAX_INTERVAL, out=active)
+
+    result = np.empty(iterations.size, dtype=np.int64)
+    result[order] = intervals
+    return result.reshape(iterations.shape)
+
+
+def calc_new_easiness_factors(old_efs, ans_qualities) -> np.ndarray:
+    """Vectorized `calc_new_easiness_factor`."""
+    old_efs = np.asarray(old_efs, dtype=np.float64)
+    ans_qualities = np.asarray(ans_qualities, dtype=np.float64)
+    efs = old_efs - 0.8 + 0.28 * ans_qualities - 0.02 * ans_qualities
+    return np.clip(efs, MIN_EASINESS_FACTOR, MAX_EASINESS_FACTOR)
+
+
+def replay_reviews(
+    iterations, easiness_factors, card_index, ans_qualities
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Apply a sequence of review events to columnar card state.
+
+    Event `i` reviews card `card_index[i]` with `ans_qualities[i]`. Events are
+    applied in order, grouped into rounds that hold at most one review per card, so
+    each round is a single vectorized SM-2 step; the number of rounds is the largest
+    number of reviews of one card.
+
+    :return: (iterations, easiness_factors, last_event) where `last_event` holds the
+        index of the last event of every card, or -1 for cards without reviews.
+    """
+    iterations = np.array(iterations, dtype=np.int64)
+    easiness_factors = np.array(easiness_factors, dtype=np.float64)
+    card_index = np.asarray(card_index, dtype=np.int64)
+    ans_qualities = np.asarray(ans_qualities, dtype=np.int64)
+    last_event = np.full(iterations.shape, -1, dtype=np.int64)
+    if card_index.size == 0:
+        return iterations, easiness_factors, last_event
+    if ans_qualities.min() < 0 or ans_qualities.max() > 5:
+        raise ValueError("Answer quality must be in range of [0, 5].")
+
+    # Rank every event among the reviews of its card, then order events by
+    # (rank, position) so that each round is a contiguous slice.
+    by_card = np.argsort(card_index, kind="stable")
+    sorted_cards = card_index[by_card]
+    starts = np.flatnonzero(np.r_[True, sorted_cards[1:] != sorted_cards[:-1]])
+    counts = np.diff(np.r_[starts, sorted_cards.size])
+    ranks = np.arange(sorted_cards.size) - np.repeat(starts, counts)
+    last_event[sorted_cards[starts + counts - 1]] = by_card[starts + counts - 1]
+
+    by_round = by_card[np.argsort(ranks, kind="stable")]
+    round_ends = np.cumsum(np.bincount(ranks))
+    round_start = 0
+    for round_end in round_ends.tolist():
+        events = by_round[round_start:round_end]
+        round_start = round_end
+        cards = card_index[events]
+        qualities = ans_qualities[events]
+        passed = qualities >= 3
+        efs = easiness_factors[cards]
+        iterations[cards] = np.where(passed, iterations[cards] + 1, 1)
+        easiness_factors[cards] = np.where(
+            passed, calc_new_easiness_factors(efs, qualities), efs
+        )
+    return iterations, easiness_factors, last_event
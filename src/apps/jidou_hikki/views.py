@@ -1,41 +1,16 @@
-from src.apps.jidou_hikki.models.vocabulary import Vocabulary
-from typing import Iterable
 from django.http import HttpResponse, HttpResponseRedirect
 from django.template import loader
 from django.shortcuts import render, get_object_or_404
 from django.contrib.auth import login, get_user_model
 
 from .utils import demo as demo_utils
+from .utils.deck import serialize_vocab_list
 from .forms import NotebookForm, JidouHikkiUserCreationForm, NotePageForm, AnalysisForm
 from .models import Notebook, NotePage, UserFlashCard
 
 JidouHikkiUser = get_user_model()
 
 
-def serialize_vocab_list(vocabularies: Iterable[Vocabulary]):
-    to_json = lambda entry: entry.to_json()
-    serialized_deck = []
-    for vocab in vocabularies:
-        for entry_json in list(map(to_json, vocab.jmdict.entries)):
-            card = {
-                "word": vocab.word,
-                "word_html": vocab.as_html(),
-                "kana": ",".join([kana["text"] for kana in entry_json.get("kana", [])]),
-                "senses": [],
-            }
-            for sense in entry_json.get("senses", []):
-                card["senses"].append(
-                    {
-                        "pos": ",".join(sense["pos"]),
-                        "translations": ",".join(
-                            tl["text"] for tl in sense["SenseGloss"]
-                        ),
-                    }
-                )
-            serialized_deck.append(card)
-    return serialized_deck
-
-
 def register_view(request):
     if request.method == "POST":
         form = JidouHikkiUserCreationForm(request.POST)
@@ -119,19 +94,25 @@ def vocabs(request):
         "new_deck": serialize_vocab_list(
             [
                 card.vocabulary
-                for card in UserFlashCard.objects.get_new_cards(owner=user)
+                for card in UserFlashCard.objects.get_new_cards(
+                    owner=user
+                ).select_related("vocabulary")
             ]
         ),
         "learning_deck": serialize_vocab_list(
             [
                 card.vocabulary
-                for card in UserFlashCard.objects.get_learning_cards(owner=user)
+                for card in UserFlashCard.objects.get_learning_cards(
+                    owner=user
+                ).select_related("vocabulary")
             ]
         ),
         "acquired_deck": serialize_vocab_list(
             [
                 card.vocabulary
-                for card in UserFlashCard.objects.get_acquired_cards(owner=user)
+                for card in UserFlashCard.objects.get_acquired_cards(
+                    owner=user
+                ).select_related("vocabulary")
             ]
         ),
     }
@@ -1,11 +1,21 @@
+import json
+from datetime import datetime
 from typing import List, Optional
 
 from ninja import Router, ModelSchema, Schema
+from ninja.errors import HttpError
 from ninja.pagination import paginate
+from ninja.responses import NinjaJSONEncoder
 from django.contrib.auth import get_user_model
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, get_list_or_404
 
-from src.apps.notebook.models import Notebook
+from src.apps.notebook.models import (
+    Notebook,
+    NotebookSection,
+    NotebookSegment,
+    ParseStatus,
+)
 
 # Schema definitions
 _User = get_user_model()
@@ -32,6 +42,7 @@ class NotebookMinSchema(ModelSchema):
             "owner",
             "title",
             "description",
+            "parse_status",
             "created_at",
             "modified_at",
         ]
@@ -51,11 +62,34 @@ class NotebookSchema(ModelSchema):
             "content_html",
             "word_list",
             "description",
+            "parse_status",
             "created_at",
             "modified_at",
         ]
 
 
+class WordSchema(Schema):
+    word: str
+    word_id: str
+    count: int
+
+
+class NotebookSegmentSchema(ModelSchema):
+    class Config:
+        model = NotebookSegment
+        model_fields = ["section", "position", "html"]
+
+
+class ParseStatusSchema(Schema):
+    notebook_id: int
+    parse_status: str
+    progress: float
+    lines_done: int = 0
+    lines_total: int = 0
+    error: str = ""
+    updated_at: Optional[datetime] = None
+
+
 class CreateNotebookSchema(Schema):
     title: str
     description: str
@@ -79,8 +113,128 @@ def list_notebooks(request):
 
 
 @router.get("/{id}", response=NotebookSchema)
-def get_notebook(request, id: int):
-    return get_object_or_404(Notebook, owner=request.user, id=id)
+def get_notebook(request, id: int, fields: str = None):
+    """Return the notebook, or only the comma-separated `fields` of it.
+
+    The response is written directly as JSON: the parse results come from the
+    notebook's pre-serialized `payload`, and columns that were not requested are
+    not read from the database.
+    """
+    all_fields = list(NotebookSchema.__fields__)
+    if fields:
+        fields = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = set(fields) - set(all_fields)
+        if unknown:
+            raise HttpError(400, f"Unknown fields: {', '.join(sorted(unknown))}")
+    else:
+        fields = all_fields
+    payload_fields = [f for f in fields if f in Notebook.PAYLOAD_FIELDS]
+    use_payload = set(payload_fields) == set(Notebook.PAYLOAD_FIELDS)
+    columns = {"id", "owner", *fields} - {"payload"}
+    if use_payload:
+        columns = (columns - set(payload_fields)) | {"payload"}
+    notebook = get_object_or_404(
+        Notebook.objects.select_related("owner").only(*columns),
+        owner=request.user,
+        id=id,
+    )
+
+    data = {}
+    for field in fields:
+        if field == "owner":
+            data[field] = OwnerSchema.from_orm(notebook.owner).dict()
+        elif field not in payload_fields:
+            data[field] = getattr(notebook, field)
+    body = json.dumps(data, cls=NinjaJSONEncoder, ensure_ascii=False)
+    if payload_fields:
+        if use_payload and not notebook.payload:
+            # Notebooks saved before payloads existed: load the deferred columns in
+            # one query and store the payload for the next requests.
+            notebook.refresh_from_db(fields=list(Notebook.PAYLOAD_FIELDS))
+            notebook.payload = notebook.serialize_payload()
+            Notebook.objects.filter(id=notebook.id, payload="").update(
+                payload=notebook.payload
+            )
+        if use_payload:
+            payload = notebook.payload
+        else:
+            payload = json.dumps(
+                {field: getattr(notebook, field) for field in payload_fields},
+                ensure_ascii=False,
+            )
+        # Splice the payload's members into the object, e.g. `{"a":1}` + `{"b":2}`.
+        body = body[:-1] + ("," if data else "") + payload[1:]
+    return HttpResponse(body, content_type="application/json; charset=utf-8")
+
+
+@router.get("/{id}/words", response=List[WordSchema])
+@paginate
+def list_words(request, id: int):
+    notebook = get_object_or_404(
+        Notebook.objects.only("id", "word_list"), owner=request.user, id=id
+    )
+    return notebook.word_list
+
+
+@router.get("/{id}/segments", response=List[NotebookSegmentSchema])
+@paginate
+def list_segments(request, id: int, section: NotebookSection = NotebookSection.CONTENT):
+    """Rendered HTML of the notebook, one non-empty line per segment."""
+    notebook = get_object_or_404(Notebook.objects.only("id"), owner=request.user, id=id)
+    return notebook.segments.filter(section=section.value).only(
+        "section", "position", "html"
+    )
+
+
+@router.get("/{id}/html", response=str)
+def stream_html(request, id: int, section: NotebookSection = NotebookSection.CONTENT):
+    """Stream the rendered HTML of a section as it is read (or tokenized)."""
+    notebook = get_object_or_404(
+        Notebook.objects.defer("title_html", "content_html", "word_list", "payload"),
+        owner=request.user,
+        id=id,
+    )
+    return StreamingHttpResponse(
+        notebook.iter_html(section), content_type="text/html; charset=utf-8"
+    )
+
+
+@router.get("/{id}/parse-status", response=ParseStatusSchema)
+def get_parse_status(request, id: int):
+    # Polled while parsing, so only read the status columns, not the notes.
+    notebook = get_object_or_404(
+        Notebook.objects.only("id", "parse_status", "modified_at"),
+        owner=request.user,
+        id=id,
+    )
+    job = (
+        notebook.parse_jobs.only(
+            "id",
+            "notebook_id",
+            "status",
+            "lines_done",
+            "lines_total",
+            "error",
+            "modified_at",
+        )
+        .order_by("-created_at")
+        .first()
+    )
+    status = {
+        "notebook_id": notebook.id,
+        "parse_status": notebook.parse_status,
+        "progress": 1.0 if notebook.parse_status == ParseStatus.DONE.value else 0.0,
+        "updated_at": notebook.modified_at,
+    }
+    if job:
+        status.update(
+            progress=job.progress,
+            lines_done=job.lines_done,
+            lines_total=job.lines_total,
+            error=job.error,
+            updated_at=job.modified_at,
+        )
+    return status
 
 
 @router.post("/", response=NotebookSchema)
@@ -0,0 +1,177 @@
+"""Async variants of the notebook endpoints, for ASGI deployments (`src.asgi`).
+
+Database access runs in asgiref's thread pool and parsing runs in the bounded CPU
+pool of `src.services.offload`, so one process keeps serving readers while a few
+notebooks are being parsed. Results are serialized inside those threads, so nothing
+lazily queries the database from the event loop.
+
+Django ninja runs authentication synchronously, and loading the session user is a
+database query; the routes therefore authenticate through `login_required` instead
+of the router's `auth`.
+"""
+import functools
+from typing import List
+
+from ninja import Query, Router, Schema
+from ninja.conf import settings as ninja_settings
+from ninja.errors import AuthenticationError
+from django.shortcuts import get_object_or_404
+
+from src.apps.notebook.models import Notebook, NotebookSection
+from src.services.offload import database_sync_to_async, run_cpu_bound
+from . import notebooks
+from .notebooks import (
+    CreateNotebookSchema,
+    NotebookMinSchema,
+    NotebookSchema,
+    NotebookSegmentSchema,
+    ParseStatusSchema,
+    UpdateNotebookSchema,
+    WordSchema,
+)
+
+_PER_PAGE = ninja_settings.PAGINATION_PER_PAGE
+MAX_PAGE_SIZE = 200
+
+
+class PagedNotebookMinSchema(Schema):
+    items: List[NotebookMinSchema]
+    count: int
+
+
+class PagedWordSchema(Schema):
+    items: List[WordSchema]
+    count: int
+
+
+class PagedNotebookSegmentSchema(Schema):
+    items: List[NotebookSegmentSchema]
+    count: int
+
+
+def _is_authenticated(request) -> bool:
+    return request.user.is_authenticated
+
+
+def login_required(view):
+    """Async counterpart of `django_auth`: resolve the session user off the loop."""
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if not await database_sync_to_async(_is_authenticated)(request):
+            raise AuthenticationError()
+        return await view(request, *args, **kwargs)
+
+    return wrapper
+
+
+# Routes
+router = Router()
+
+
+@router.get("/", response=PagedNotebookMinSchema)
+@login_required
+async def list_notebooks(
+    request,
+    limit: int = Query(_PER_PAGE, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+):
+    def query():
+        queryset = Notebook.objects.filter(owner=request.user).select_related("owner")
+        return {
+            "items": [
+                NotebookMinSchema.from_orm(notebook).dict()
+                for notebook in queryset[offset : offset + limit]
+            ],
+            "count": queryset.count(),
+        }
+
+    return await database_sync_to_async(query)()
+
+
+@router.get("/{id}", response=NotebookSchema)
+@login_required
+async def get_notebook(request, id: int, fields: str = None):
+    # Returns a pre-serialized HttpResponse, see `notebooks.get_notebook`.
+    return await database_sync_to_async(notebooks.get_notebook)(request, id, fields)
+
+
+@router.get("/{id}/words", response=PagedWordSchema)
+@login_required
+async def list_words(
+    request,
+    id: int,
+    limit: int = Query(_PER_PAGE, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+):
+    def query():
+        notebook = get_object_or_404(
+            Notebook.objects.only("id", "word_list"), owner=request.user, id=id
+        )
+        return {
+            "items": notebook.word_list[offset : offset + limit],
+            "count": len(notebook.word_list),
+        }
+
+    return await database_sync_to_async(query)()
+
+
+@router.get("/{id}/segments", response=PagedNotebookSegmentSchema)
+@login_required
+async def list_segments(
+    request,
+    id: int,
+    section: NotebookSection = NotebookSection.CONTENT,
+    limit: int = Query(_PER_PAGE, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+):
+    def query():
+        notebook = get_object_or_404(
+            Notebook.objects.only("id"), owner=request.user, id=id
+        )
+        segments = notebook.segments.filter(section=section.value)
+        return {
+            "items": list(
+                segments.values("section", "position", "html")[offset : offset + limit]
+            ),
+            "count": segments.count(),
+        }
+
+    return await database_sync_to_async(query)()
+
+
+@router.get("/{id}/parse-status", response=ParseStatusSchema)
+@login_required
+async def get_parse_status(request, id: int):
+    return await database_sync_to_async(notebooks.get_parse_status)(request, id)
+
+
+def _serialized(view):
+    """Run a view returning a notebook and serialize it in the same thread."""
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        return NotebookSchema.from_orm(view(*args, **kwargs)).dict()
+
+    return wrapper
+
+
+@router.post("/", response=NotebookSchema)
+@login_required
+async def create_notebook(request, data: CreateNotebookSchema):
+    # Parsing happens here unless NOTEBOOK_ASYNC_PARSING hands it to the worker.
+    return await run_cpu_bound(_serialized(notebooks.create_notebook), request, data)
+
+
+@router.api_operation(["PUT", "PATCH"], "/{id}", response=NotebookSchema)
+@login_required
+async def update_notebook(request, id: int, data: UpdateNotebookSchema):
+    return await run_cpu_bound(
+        _serialized(notebooks.update_notebook), request, id, data
+    )
+
+
+@router.delete("/{id}", response={204: None})
+@login_required
+async def delete_notebook(request, id: int):
+    return await database_sync_to_async(notebooks.delete_notebook)(request, id)
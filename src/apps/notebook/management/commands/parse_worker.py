@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from src.apps.notebook.worker import run_worker
+
+
+class Command(BaseCommand):
+    help = "Run a worker that parses queued notebooks in the background."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait before polling an empty queue again.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once the queue is empty.",
+        )
+
+    def handle(self, *args, **options):
+        run_worker(poll_interval=options["poll_interval"], once=options["once"])
@@ -0,0 +1,40 @@
+# Generated by Django 3.2.4 on 2026-10-17 20:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notebook', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notebook',
+            name='parse_status',
+            field=models.CharField(default='done', max_length=32),
+        ),
+        migrations.CreateModel(
+            name='ParseJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('parse_fields', models.JSONField(default=list)),
+                ('status', models.CharField(default='pending', max_length=32)),
+                ('lines_done', models.IntegerField(default=0)),
+                ('lines_total', models.IntegerField(default=0)),
+                ('attempts', models.IntegerField(default=0)),
+                ('error', models.TextField(default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('modified_at', models.DateTimeField(auto_now=True)),
+                ('started_at', models.DateTimeField(default=None, null=True)),
+                ('finished_at', models.DateTimeField(default=None, null=True)),
+                ('notebook', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='parse_jobs', to='notebook.notebook')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='parsejob',
+            index=models.Index(fields=['status', 'created_at'], name='notebook_pa_status_46934e_idx'),
+        ),
+    ]
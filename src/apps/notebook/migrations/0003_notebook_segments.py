@@ -0,0 +1,30 @@
+# Generated by Django 3.2.4 on 2026-10-17 20:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notebook', '0002_parse_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotebookSegment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('section', models.CharField(max_length=16)),
+                ('position', models.IntegerField()),
+                ('line_hash', models.CharField(max_length=40)),
+                ('html', models.TextField(default='')),
+                ('words', models.JSONField(default=list)),
+                ('notebook', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='segments', to='notebook.notebook')),
+            ],
+            options={
+                'ordering': ['notebook', 'section', 'position'],
+                'unique_together': {('notebook', 'section', 'position')},
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 3.2.4 on 2026-10-17 20:19
+
+import json
+
+from django.db import migrations, models
+
+
+def serialize_payloads(apps, schema_editor):
+    Notebook = apps.get_model("notebook", "Notebook")
+    fields = ("title_html", "content_html", "word_list")
+    for notebook in Notebook.objects.only("id", *fields).iterator():
+        notebook.payload = json.dumps(
+            {field: getattr(notebook, field) for field in fields},
+            ensure_ascii=False,
+        )
+        notebook.save(update_fields=["payload"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notebook", "0003_notebook_segments"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notebook",
+            name="payload",
+            field=models.TextField(default=""),
+        ),
+        migrations.RunPython(serialize_payloads, migrations.RunPython.noop),
+    ]
@@ -1,39 +1,74 @@
-from typing import Dict, List, Tuple
+import hashlib
+import json
+import time
+from datetime import timedelta
+from enum import Enum
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
+from django.conf import settings
 from django.db import models, transaction
+from django.db.models import F
 from django.contrib.auth import get_user_model
-from pydantic import BaseModel
+from django.utils import timezone
 
+from src.services.analysis import get_analysis, set_analysis
 from src.services.logging import logger
-from src.services.tokenizer import DefaultTokenizer
+from src.services.tokenizer.states import DefaultTokenizer, DefaultTokenizerBackend
+from src.services.tokenizer.html import get_renderer
 from src.services.tokenizer.utils import check_only_japanese_chars
-from src.services.tokenizer.schemas import PartOfSpeech, Token
+from src.services.tokenizer.schemas import CompactToken, PartOfSpeech
 from src.apps.wordcollection.models import Word, WordCollection
 
 _User = get_user_model()
 
+ProgressCallback = Callable[[int, int], None]
 
-class WordToken(BaseModel):
-    word: str
-    word_id: str
-    count: int = 1
 
-    def __hash__(self):
-        return hash(tuple(self.word_id))
+class ParseStatus(str, Enum):
+    PENDING = "pending"
+    PROCESSING = "processing"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class NotebookSection(str, Enum):
+    TITLE = "title"
+    CONTENT = "content"
+
+
+# Bump whenever the rendered HTML changes, so that segments stored by an older
+# version are rendered again instead of being reused.
+_SEGMENT_VERSION = "2"
+
+
+# Whole-section parse results in the analysis cache, as (html, words) per line
+_ANALYSIS_KIND = f"notebook:{_SEGMENT_VERSION}"
+
+
+def _line_hash(line: str) -> str:
+    return hashlib.sha1(f"{_SEGMENT_VERSION}:{line}".encode("utf-8")).hexdigest()
 
 
 class NotebookManager(models.Manager):
     @transaction.atomic
     def create_notes(self, **kwargs):
+        if settings.NOTEBOOK_ASYNC_PARSING:
+            notes = self.create(parse_status=ParseStatus.PENDING.value, **kwargs)
+            ParseJob.objects.enqueue(notes, ["title", "content"])
+            return notes
         notes = self.create(**kwargs)
-        notes.parse_title(save=False)
         notes.parse_content(save=False)
+        notes.parse_title(save=False)
         notes.save()
         notes.register_words()
         return notes
 
 
 class Notebook(models.Model):
+    # Parse results that are also kept pre-serialized in `payload`
+    PAYLOAD_FIELDS = ("title_html", "content_html", "word_list")
+
     objects: NotebookManager = NotebookManager()
 
     owner = models.ForeignKey(_User, on_delete=models.CASCADE)
@@ -43,30 +78,62 @@ class Notebook(models.Model):
     content = models.TextField()
     content_html = models.TextField(default="")
     word_list = models.JSONField(default=list)
+    payload = models.TextField(default="")
     words = models.ManyToManyField(Word)
+    parse_status = models.CharField(max_length=32, default=ParseStatus.DONE.value)
     created_at = models.DateTimeField(auto_now_add=True)
     modified_at = models.DateTimeField(auto_now=True)
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._loaded_segments = {}
+        self._pending_segments = {}
+        self._payload_stale = False
+
     @transaction.atomic
     def update_notes(self, data: Dict):
         for key, val in data.items():
             if val is not None:
                 setattr(self, key, val)
-        if "title" in data:
-            self.parse_title(save=False)
-        if "content" in data:
+        fields = [key for key in ("title", "content") if data.get(key) is not None]
+        if fields and settings.NOTEBOOK_ASYNC_PARSING:
+            self.parse_status = ParseStatus.PENDING.value
+            self.save()
+            ParseJob.objects.enqueue(self, fields)
+            return
+        known_words = self.known_word_ids()
+        if "content" in fields:
             self.parse_content(save=False)
+        if "title" in fields:
+            self.parse_title(save=False)
         self.save()
-        self.register_words()
+        self.register_words(exclude=known_words)
 
     @transaction.atomic
     def redo_parsing(self):
-        self.parse_title(save=False)
-        self.parse_content(save=False)
+        self.parse_content(save=False, reuse=False)
+        self.parse_title(save=False, reuse=False)
         self.save()
         self.register_words()
 
-    def _should_save_token(self, token: Token) -> bool:
+    def save(self, *args, **kwargs):
+        if self._payload_stale:
+            self.payload = self.serialize_payload()
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = [*kwargs["update_fields"], "payload"]
+            self._payload_stale = False
+        super().save(*args, **kwargs)
+        if self._pending_segments:
+            self._write_segments()
+
+    def serialize_payload(self) -> str:
+        """JSON object of the `PAYLOAD_FIELDS`, served as-is by the notebook API."""
+        return json.dumps(
+            {field: getattr(self, field) for field in self.PAYLOAD_FIELDS},
+            ensure_ascii=False,
+        )
+
+    def _should_save_token(self, token: CompactToken) -> bool:
         """Check if token should be saved into collection."""
         verdict = False
         try:
@@ -81,58 +148,405 @@ class Notebook(models.Model):
             logger.warning(f"Unknown part-of-speech found: {token}")
         return verdict
 
-    def parse_title(self, *, save=True):
-        html_lines, word_tokens = self._parse_html_and_tokens([self.title])
-        self.title_html = "<br>".join(html_lines)
-        self.add_word_list(word_tokens)
+    def parse_title(self, *, save=True, reuse=True):
+        segments = self._parse_section(NotebookSection.TITLE, reuse=reuse)
+        self.title_html = "<br>".join(segment.html for segment in segments)
+        self.word_list = self._collect_word_list()
+        self._payload_stale = True
         if save:
             self.save()
 
-    def parse_content(self, *, save=True):
-        lines = self.content.split("\n")
-        html_lines, word_tokens = self._parse_html_and_tokens(lines)
-        self.content_html = "<br>".join(html_lines)
-        self.add_word_list(word_tokens)
+    def parse_content(
+        self, *, save=True, reuse=True, progress: ProgressCallback = None
+    ):
+        segments = self._parse_section(
+            NotebookSection.CONTENT, reuse=reuse, progress=progress
+        )
+        self.content_html = "<br>".join(segment.html for segment in segments)
+        self.word_list = self._collect_word_list()
+        self._payload_stale = True
         if save:
             self.save()
 
+    def iter_html(
+        self, section: "NotebookSection" = None, chunk_size: int = 64
+    ) -> Iterator[str]:
+        """Yield the rendered HTML of a section, `chunk_size` lines at a time.
+
+        Parsed notebooks are streamed from their stored segments; notebooks that are
+        not parsed yet are tokenized chunk by chunk. Joined together, the chunks are
+        the section's `*_html` field.
+        """
+        section = section or NotebookSection.CONTENT
+        segments = self.segments.filter(section=section.value)
+        if self.parse_status == ParseStatus.DONE.value and segments.exists():
+            html_lines = (
+                segments.order_by("position")
+                .values_list("html", flat=True)
+                .iterator(chunk_size=chunk_size)
+            )
+        else:
+            render_line = get_renderer().render_line
+            html_lines = (
+                render_line(tokens)
+                for tokens in DefaultTokenizer.tokenize_stream(
+                    self._section_lines(section)
+                )
+            )
+        separator = ""
+        while True:
+            chunk = list(islice(html_lines, chunk_size))
+            if not chunk:
+                return
+            yield separator + "<br>".join(chunk)
+            separator = "<br>"
+
+    def _section_lines(self, section: "NotebookSection") -> List[str]:
+        text = self.title if section == NotebookSection.TITLE else self.content
+        return [line.strip() for line in text.split("\n") if line]
+
+    def _stored_segments(self, section: "NotebookSection") -> List["NotebookSegment"]:
+        if section not in self._loaded_segments:
+            self._loaded_segments[section] = (
+                list(self.segments.filter(section=section.value).order_by("position"))
+                if self.pk
+                else []
+            )
+        return self._loaded_segments[section]
+
+    def _parse_section(
+        self,
+        section: "NotebookSection",
+        reuse: bool = True,
+        progress: ProgressCallback = None,
+    ) -> List["NotebookSegment"]:
+        """Parse a section line by line, only tokenizing lines not parsed before.
+
+        The resulting segments are written to the database on the next `save()`.
+        """
+        lines = self._section_lines(section)
+        previous = []
+        if reuse:
+            previous.extend(self._stored_segments(section))
+            previous.extend(self._pending_segments.get(section, []))
+        cached = {
+            segment.line_hash: (segment.html, segment.words) for segment in previous
+        }
+        hashes = [_line_hash(line) for line in lines]
+        missing = {}
+        for line_hash, line in zip(hashes, lines):
+            if line_hash not in cached:
+                missing[line_hash] = line
+        # Texts parsed from scratch (e.g. a re-imported chapter) may have been parsed
+        # before, by any notebook. `reuse=False` forces an actual parse.
+        from_scratch = missing and len(missing) == len(set(hashes))
+        text = "\n".join(lines)
+        analysis = None
+        if from_scratch and reuse:
+            analysis = get_analysis(_ANALYSIS_KIND, text)
+        if analysis is not None:
+            cached.update(zip(hashes, analysis))
+            missing = {}
+        html_lines, word_tokens = self._parse_html_and_tokens(
+            list(missing.values()), progress
+        )
+        cached.update(zip(missing.keys(), zip(html_lines, word_tokens)))
+        if from_scratch and analysis is None:
+            set_analysis(_ANALYSIS_KIND, text, [cached[h] for h in hashes])
+
+        segments = []
+        for position, line_hash in enumerate(hashes):
+            html, words = cached[line_hash]
+            segments.append(
+                NotebookSegment(
+                    notebook=self,
+                    section=section.value,
+                    position=position,
+                    line_hash=line_hash,
+                    html=html,
+                    words=words,
+                )
+            )
+        self._pending_segments[section] = segments
+        return segments
+
+    def _section_segments(self, section: "NotebookSection") -> List["NotebookSegment"]:
+        if section in self._pending_segments:
+            return self._pending_segments[section]
+        segments = self._stored_segments(section)
+        if not segments and self._section_lines(section):
+            # Notebooks parsed before segments were stored
+            segments = self._parse_section(section)
+        return segments
+
+    def _collect_word_list(self) -> List[Dict]:
+        """Sum the word counts of every title and content segment."""
+        word_token_map = {}
+        for section in NotebookSection:
+            for segment in self._section_segments(section):
+                for word in segment.words:
+                    if word["word_id"] not in word_token_map:
+                        word_token_map[word["word_id"]] = dict(word)
+                    else:
+                        word_token_map[word["word_id"]]["count"] += word["count"]
+        return sorted(
+            word_token_map.values(), key=lambda item: item["count"], reverse=True
+        )
+
+    @transaction.atomic
+    def _write_segments(self):
+        """Persist parsed segments, only touching rows whose line changed."""
+        for section, segments in self._pending_segments.items():
+            stored = {
+                segment.position: segment for segment in self._stored_segments(section)
+            }
+            to_create = []
+            to_update = []
+            for segment in segments:
+                old = stored.pop(segment.position, None)
+                if old is None:
+                    to_create.append(segment)
+                elif old.line_hash != segment.line_hash:
+                    old.line_hash = segment.line_hash
+                    old.html = segment.html
+                    old.words = segment.words
+                    to_update.append(old)
+            if stored:
+                NotebookSegment.objects.filter(
+                    id__in=[segment.id for segment in stored.values()]
+                ).delete()
+            NotebookSegment.objects.bulk_update(
+                to_update, ["line_hash", "html", "words"]
+            )
+            NotebookSegment.objects.bulk_create(to_create)
+        self._pending_segments = {}
+        self._loaded_segments = {}
+
     def _parse_html_and_tokens(
-        self, lines_of_text: List[str]
-    ) -> Tuple[List[str], List[Token]]:
+        self, lines: List[str], progress: ProgressCallback = None
+    ) -> Tuple[List[str], List[List[Dict]]]:
+        """Render lines to HTML and count the noteworthy words of each line.
+
+        :param progress: Optional callback receiving (lines_done, lines_total).
+        """
+        render_line = get_renderer().render_line
         html_lines = []
-        word_token_map = {}
-        for line in lines_of_text:
-            if line:
-                tokens = DefaultTokenizer.tokenize_text(line.strip())
-                html = []
-                for tkn in tokens:
-                    html.append(tkn.to_html())
-                    if self._should_save_token(tkn):
-                        if tkn.word_id not in word_token_map:
-                            word_token_map[tkn.word_id] = {
-                                "word": tkn.normalized_form,
-                                "word_id": tkn.word_id,
-                                "count": 1,
-                            }
-                        else:
-                            word_token_map[tkn.word_id]["count"] += 1
-                html_lines.append("".join(html))
-        word_tokens = list(word_token_map.values())
+        word_tokens = []
+        for tokens in DefaultTokenizerBackend.tokenize_stream(lines):
+            html_lines.append(render_line(tokens))
+            word_token_map = {}
+            for tkn in tokens:
+                if self._should_save_token(tkn):
+                    if tkn.word_id not in word_token_map:
+                        word_token_map[tkn.word_id] = {
+                            "word": tkn.normalized_form,
+                            "word_id": tkn.word_id,
+                            "count": 1,
+                        }
+                    else:
+                        word_token_map[tkn.word_id]["count"] += 1
+            word_tokens.append(list(word_token_map.values()))
+            if progress:
+                progress(len(html_lines), len(lines))
         return html_lines, word_tokens
 
-    def add_word_list(self, words: List[Dict]):
-        current_state = set([WordToken(**wt) for wt in self.word_list])
-        additional_state = set([WordToken(**wt) for wt in words])
-        new_state = current_state.union(additional_state)
-        self.word_list = sorted(
-            [wt.dict() for wt in new_state],
-            key=lambda item: item["count"],
-            reverse=True,
-        )
+    def known_word_ids(self) -> Set[str]:
+        return {word["word_id"] for word in self.word_list}
 
     @transaction.atomic
-    def register_words(self):
-        for word in self.word_list:
-            tokens = DefaultTokenizer.tokenize_text(word["word"])
-            for tkn in tokens:
-                WordCollection.objects.add_token(self.owner, tkn)
+    def register_words(self, exclude: Set[str] = frozenset()):
+        """Add the notebook's words to the owner's collection.
+
+        :param exclude: IDs of words that were already registered.
+        """
+        words = [
+            word["word"] for word in self.word_list if word["word_id"] not in exclude
+        ]
+        tokens = [
+            tkn for tokens in DefaultTokenizer.tokenize_stream(words) for tkn in tokens
+        ]
+        WordCollection.objects.add_tokens(self.owner, tokens)
+
+
+class NotebookSegment(models.Model):
+    """Parse result of a single non-empty line of a notebook's title or content."""
+
+    notebook = models.ForeignKey(
+        Notebook, on_delete=models.CASCADE, related_name="segments"
+    )
+    section = models.CharField(max_length=16)
+    position = models.IntegerField()
+    line_hash = models.CharField(max_length=40)
+    html = models.TextField(default="")
+    words = models.JSONField(default=list)
+
+    class Meta:
+        unique_together = ["notebook", "section", "position"]
+        ordering = ["notebook", "section", "position"]
+
+    def __repr__(self) -> str:
+        return f"<NotebookSegment: {self.notebook_id} {self.section}[{self.position}]>"
+
+
+class ParseJobManager(models.Manager):
+    def enqueue(self, notebook: Notebook, fields: Iterable[str]) -> "ParseJob":
+        """Queue parsing of the given notebook fields, merging into a pending job."""
+        job = self.filter(notebook=notebook, status=ParseStatus.PENDING.value).first()
+        if job:
+            job.parse_fields = sorted(set(job.parse_fields) | set(fields))
+            job.save(update_fields=["parse_fields", "modified_at"])
+            return job
+        return self.create(notebook=notebook, parse_fields=sorted(fields))
+
+    def claim_next(self) -> Optional["ParseJob"]:
+        """Atomically mark the oldest runnable job as processing and return it.
+
+        Jobs of a notebook that is already being parsed are skipped so that parse
+        results are always written in the order the edits were made.
+        """
+        busy = self.filter(status=ParseStatus.PROCESSING.value).values("notebook_id")
+        candidates = (
+            self.filter(status=ParseStatus.PENDING.value)
+            .exclude(notebook_id__in=busy)
+            .order_by("created_at")
+            .values_list("id", flat=True)[:10]
+        )
+        for job_id in candidates:
+            now = timezone.now()
+            claimed = self.filter(id=job_id, status=ParseStatus.PENDING.value).update(
+                status=ParseStatus.PROCESSING.value,
+                started_at=now,
+                modified_at=now,
+                attempts=F("attempts") + 1,
+            )
+            if claimed:
+                return self.select_related("notebook__owner").get(id=job_id)
+        return None
+
+    def requeue_stale(self, timeout: timedelta, max_attempts: int) -> int:
+        """Put back jobs left in processing state by a worker that died.
+
+        A job is stale when its heartbeat (`modified_at`, written when it is claimed
+        and by `ParseJob.report_progress`) is older than `timeout`, so long parses
+        that are still running are left alone. Stale jobs that were already
+        attempted `max_attempts` times are failed instead, as they are likely what
+        kills the workers.
+
+        :return: The number of requeued jobs.
+        """
+        now = timezone.now()
+        stale = self.filter(
+            status=ParseStatus.PROCESSING.value, modified_at__lt=now - timeout
+        )
+        exhausted = dict(
+            stale.filter(attempts__gte=max_attempts).values_list("id", "notebook_id")
+        )
+        if exhausted:
+            stale.filter(id__in=exhausted).update(
+                status=ParseStatus.FAILED.value,
+                error=f"Abandoned after {max_attempts} attempts.",
+                finished_at=now,
+                modified_at=now,
+            )
+            Notebook.objects.filter(id__in=exhausted.values()).update(
+                parse_status=ParseStatus.FAILED.value
+            )
+        return stale.filter(attempts__lt=max_attempts).update(
+            status=ParseStatus.PENDING.value, modified_at=now
+        )
+
+
+class ParseJob(models.Model):
+    objects: ParseJobManager = ParseJobManager()
+
+    _progress_interval = 1.0  # seconds between progress writes
+
+    notebook = models.ForeignKey(
+        Notebook, on_delete=models.CASCADE, related_name="parse_jobs"
+    )
+    parse_fields = models.JSONField(default=list)
+    status = models.CharField(max_length=32, default=ParseStatus.PENDING.value)
+    lines_done = models.IntegerField(default=0)
+    lines_total = models.IntegerField(default=0)
+    attempts = models.IntegerField(default=0)
+    error = models.TextField(default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    modified_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(null=True, default=None)
+    finished_at = models.DateTimeField(null=True, default=None)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "created_at"])]
+
+    def __repr__(self) -> str:
+        return f"<ParseJob({self.id}): notebook={self.notebook_id} {self.status}>"
+
+    @property
+    def progress(self) -> float:
+        if self.status == ParseStatus.DONE.value:
+            return 1.0
+        if not self.lines_total:
+            return 0.0
+        return self.lines_done / self.lines_total
+
+    def run(self):
+        """Parse the notebook outside of a transaction, then persist atomically."""
+        notebook = self.notebook
+        known_words = notebook.known_word_ids()
+        self._last_progress_write = 0.0
+        if "content" in self.parse_fields:
+            notebook.parse_content(save=False, progress=self.report_progress)
+        if "title" in self.parse_fields:
+            notebook.parse_title(save=False)
+
+        with transaction.atomic():
+            # Lock the notebook so an edit cannot queue a job between the check
+            # below and the write of `parse_status` (which would mark it done).
+            Notebook.objects.select_for_update().only("id").get(id=notebook.id)
+            has_newer_job = (
+                ParseJob.objects.filter(
+                    notebook_id=notebook.id, status=ParseStatus.PENDING.value
+                )
+                .exclude(id=self.id)
+                .exists()
+            )
+            notebook.parse_status = (
+                ParseStatus.PENDING.value if has_newer_job else ParseStatus.DONE.value
+            )
+            # Only write parse results so edits made while parsing are not lost.
+            notebook.save(
+                update_fields=[
+                    "title_html",
+                    "content_html",
+                    "word_list",
+                    "parse_status",
+                    "modified_at",
+                ]
+            )
+            notebook.register_words(exclude=known_words)
+            self.status = ParseStatus.DONE.value
+            self.finished_at = timezone.now()
+            self.save(update_fields=["status", "finished_at", "modified_at"])
+
+    def fail(self, error: Exception):
+        self.status = ParseStatus.FAILED.value
+        self.error = repr(error)
+        self.finished_at = timezone.now()
+        self.save(update_fields=["status", "error", "finished_at", "modified_at"])
+        Notebook.objects.filter(id=self.notebook_id).update(
+            parse_status=ParseStatus.FAILED.value
+        )
+
+    def report_progress(self, lines_done: int, lines_total: int):
+        now = time.monotonic()
+        if (
+            lines_done < lines_total
+            and now - self._last_progress_write < self._progress_interval
+        ):
+            return
+        self._last_progress_write = now
+        self.lines_done = lines_done
+        self.lines_total = lines_total
+        ParseJob.objects.filter(id=self.id).update(
+            lines_done=lines_done, lines_total=lines_total, modified_at=timezone.now()
+        )
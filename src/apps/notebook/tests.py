@@ -1,3 +1,241 @@
-from django.test import TestCase
+import json
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from ninja.responses import NinjaJSONEncoder
+
+from .api.notebooks import NotebookSchema
+from .models import Notebook, NotebookSection, ParseJob, ParseStatus
+from .worker import run_worker
+
+
+@override_settings(
+    NOTEBOOK_ASYNC_PARSING=True,
+    NOTEBOOK_PARSE_JOB_TIMEOUT=0,
+    NOTEBOOK_PARSE_JOB_MAX_ATTEMPTS=3,
+)
+class ParseWorkerTest(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create(username="owner")
+        self.notebook = Notebook.objects.create_notes(
+            owner=self.owner, title="題名", description="", content="学校に行く"
+        )
+
+    def test_edit_after_crashed_job_is_parsed(self):
+        run = ParseJob.run
+        crashed = []
+
+        def crash_once(job):
+            if crashed:
+                return run(job)
+            # Another worker died mid-parse: the job stays processing, and the
+            # notebook is edited meanwhile.
+            crashed.append(job.id)
+            notebook = Notebook.objects.get(id=job.notebook_id)
+            notebook.update_notes({"content": "先生が来た"})
+
+        with mock.patch.object(ParseJob, "run", autospec=True, side_effect=crash_once):
+            run_worker(once=True)
+
+        self.assertEqual(len(crashed), 1)
+        notebook = Notebook.objects.get(id=self.notebook.id)
+        self.assertEqual(notebook.parse_status, ParseStatus.DONE.value)
+        self.assertIn("先生", notebook.content_html)
+        self.assertEqual(
+            set(ParseJob.objects.values_list("status", flat=True)),
+            {ParseStatus.DONE.value},
+        )
+
+    def test_job_crashing_every_attempt_fails(self):
+        def crash(job):
+            pass
+
+        with mock.patch.object(ParseJob, "run", autospec=True, side_effect=crash):
+            run_worker(once=True)
+
+        job = ParseJob.objects.get()
+        self.assertEqual(job.status, ParseStatus.FAILED.value)
+        self.assertEqual(job.attempts, 3)
+        notebook = Notebook.objects.get(id=self.notebook.id)
+        self.assertEqual(notebook.parse_status, ParseStatus.FAILED.value)
+
+    def test_requeue_skips_jobs_with_a_recent_heartbeat(self):
+        job = ParseJob.objects.claim_next()
+        ParseJob.objects.filter(id=job.id).update(
+            started_at=timezone.now() - timedelta(hours=1)
+        )
+        job._last_progress_write = 0.0
+        job.report_progress(1, 10)
+
+        timeout = timedelta(minutes=10)
+        self.assertEqual(ParseJob.objects.requeue_stale(timeout, 3), 0)
+        ParseJob.objects.filter(id=job.id).update(
+            modified_at=timezone.now() - timedelta(hours=1)
+        )
+        self.assertEqual(ParseJob.objects.requeue_stale(timeout, 3), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ParseStatus.PENDING.value)
+
+
+@override_settings(NOTEBOOK_ASYNC_PARSING=True)
+class ParseStatusApiTest(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create(username="owner")
+        self.client.force_login(self.owner)
+        self.notebook = Notebook.objects.create_notes(
+            owner=self.owner, title="題名", description="", content="学校に行く"
+        )
+
+    def test_progress_is_read_from_the_latest_job(self):
+        job = ParseJob.objects.claim_next()
+        job._last_progress_write = 0.0
+        job.report_progress(3, 4)
+
+        with self.assertNumQueries(4) as queries:
+            # Session, user, notebook and job.
+            response = self.client.get(
+                f"/api/notebooks/{self.notebook.id}/parse-status"
+            )
+
+        self.assertEqual(response.status_code, 200)
+        status = response.json()
+        self.assertEqual(status["parse_status"], ParseStatus.PENDING.value)
+        self.assertEqual((status["lines_done"], status["lines_total"]), (3, 4))
+        self.assertEqual(status["progress"], 0.75)
+        notebook_sql = next(
+            query["sql"]
+            for query in queries.captured_queries
+            if 'FROM "notebook_notebook"' in query["sql"]
+        )
+        self.assertNotIn("content", notebook_sql)
+
+
+class AsyncPaginationTest(TestCase):
+    def test_out_of_range_pages_are_rejected(self):
+        paths = [
+            "/api/async/notebooks/",
+            "/api/async/notebooks/1/words",
+            "/api/async/notebooks/1/segments",
+        ]
+        for path in paths:
+            for params in [{"offset": -1}, {"limit": 0}, {"limit": 10**6}]:
+                with self.subTest(path=path, **params):
+                    response = self.client.get(path, params)
+                    self.assertEqual(response.status_code, 422)
+
+
+@override_settings(NOTEBOOK_ASYNC_PARSING=False)
+class IncrementalParseTest(TestCase):
+    lines = ["学校に行く", "先生が来た", "猫が鳴く"]
+
+    def setUp(self):
+        self.owner = User.objects.create(username="owner")
+        self.notebook = Notebook.objects.create_notes(
+            owner=self.owner, title="題名", description="", content="\n".join(self.lines)
+        )
+
+    def edit(self, lines):
+        """Save new content, returning the lines that were tokenized again."""
+        parse = Notebook._parse_html_and_tokens
+        notebook = Notebook.objects.get(id=self.notebook.id)
+        with mock.patch.object(
+            Notebook, "_parse_html_and_tokens", autospec=True, side_effect=parse
+        ) as parsed:
+            notebook.update_notes({"content": "\n".join(lines)})
+        return [line for call in parsed.call_args_list for line in call.args[1]]
+
+    def assertMatchesFullParse(self, lines):
+        notebook = Notebook.objects.get(id=self.notebook.id)
+        segments = list(
+            notebook.segments.filter(section=NotebookSection.CONTENT.value)
+            .order_by("position")
+            .values_list("position", "html")
+        )
+        self.assertEqual(
+            [position for position, _ in segments], list(range(len(lines)))
+        )
+
+        reparsed = Notebook.objects.get(id=self.notebook.id)
+        reparsed.redo_parsing()
+        self.assertEqual(notebook.content_html, reparsed.content_html)
+        self.assertEqual(notebook.word_list, reparsed.word_list)
+        self.assertEqual(
+            [html for _, html in segments],
+            list(
+                reparsed.segments.filter(section=NotebookSection.CONTENT.value)
+                .order_by("position")
+                .values_list("html", flat=True)
+            ),
+        )
+
+    def test_edited_line_is_the_only_one_parsed(self):
+        lines = ["学校に行く", "先生が帰った", "猫が鳴く"]
+
+        self.assertEqual(self.edit(lines), ["先生が帰った"])
+        self.assertMatchesFullParse(lines)
+
+    def test_inserted_line_shifts_the_following_ones(self):
+        lines = ["学校に行く", "犬が走る", "先生が来た", "猫が鳴く"]
+
+        self.assertEqual(self.edit(lines), ["犬が走る"])
+        self.assertMatchesFullParse(lines)
+
+    def test_deleted_line_shifts_the_following_ones(self):
+        lines = ["学校に行く", "猫が鳴く"]
+
+        self.assertEqual(self.edit(lines), [])
+        self.assertMatchesFullParse(lines)
+
+
+@override_settings(NOTEBOOK_ASYNC_PARSING=False)
+class GetNotebookApiTest(TestCase):
+    field_sets = [
+        None,
+        "title",
+        "content_html",
+        "id,owner,word_list",
+        "title_html,content_html,word_list",
+        "parse_status, word_list ,title_html,content_html,modified_at",
+    ]
+
+    def setUp(self):
+        self.owner = User.objects.create(username="owner")
+        self.client.force_login(self.owner)
+        self.notebook = Notebook.objects.create_notes(
+            owner=self.owner,
+            title="題名",
+            description="説明",
+            content="学校に行く\n先生が来た",
+        )
+
+    def expected(self, fields=None):
+        notebook = Notebook.objects.get(id=self.notebook.id)
+        data = json.loads(
+            json.dumps(NotebookSchema.from_orm(notebook).dict(), cls=NinjaJSONEncoder)
+        )
+        if fields:
+            data = {field.strip(): data[field.strip()] for field in fields.split(",")}
+        return data
+
+    def get(self, fields=None):
+        params = {"fields": fields} if fields else {}
+        response = self.client.get(f"/api/notebooks/{self.notebook.id}", params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_fields_match_the_schema(self):
+        for fields in self.field_sets:
+            with self.subTest(fields=fields):
+                self.assertEqual(self.get(fields), self.expected(fields))
+
+    def test_empty_payload_is_backfilled(self):
+        Notebook.objects.filter(id=self.notebook.id).update(payload="")
+
+        for fields in self.field_sets:
+            with self.subTest(fields=fields):
+                self.assertEqual(self.get(fields), self.expected(fields))
+        notebook = Notebook.objects.get(id=self.notebook.id)
+        self.assertEqual(notebook.payload, notebook.serialize_payload())
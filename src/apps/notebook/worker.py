@@ -0,0 +1,48 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from src.services.logging import logger
+from .models import ParseJob
+
+
+def run_worker(poll_interval: float = 1.0, once: bool = False):
+    """Process queued notebook parse jobs until interrupted.
+
+    :param poll_interval: Seconds to sleep when the queue is empty.
+    :param once: Return as soon as the queue is empty instead of polling.
+    """
+    timeout = timedelta(seconds=settings.NOTEBOOK_PARSE_JOB_TIMEOUT)
+    # Jobs of a crashed worker block their notebook's queue, so look for them
+    # regularly rather than only when this worker starts.
+    requeue_interval = min(settings.NOTEBOOK_PARSE_JOB_TIMEOUT, 60)
+    next_requeue = 0.0
+
+    while True:
+        close_old_connections()
+        if time.monotonic() >= next_requeue:
+            requeued = ParseJob.objects.requeue_stale(
+                timeout, settings.NOTEBOOK_PARSE_JOB_MAX_ATTEMPTS
+            )
+            if requeued:
+                logger.warning(f"Requeued {requeued} stale parse job(s).")
+            next_requeue = time.monotonic() + requeue_interval
+        job = ParseJob.objects.claim_next()
+        if job is None:
+            if once:
+                return
+            time.sleep(poll_interval)
+            continue
+
+        logger.info(f"Parsing notebook {job.notebook_id} ({job.parse_fields}).")
+        started = time.perf_counter()
+        try:
+            job.run()
+        except Exception as e:
+            logger.exception(f"Parse job {job.id} failed.")
+            job.fail(e)
+        else:
+            elapsed = time.perf_counter() - started
+            logger.info(f"Parsed notebook {job.notebook_id} in {elapsed:.2f}s.")
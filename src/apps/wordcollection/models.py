@@ -1,23 +1,41 @@
 from enum import Enum
-from typing import Tuple
+from typing import Dict, Iterable, Tuple, Union
 
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AbstractUser
 
-from src.services.tokenizer.schemas import Token
+from src.services.tokenizer.schemas import CompactToken, Token
 
 _User = get_user_model()
 
 
+def _as_schema(token: Union[Token, CompactToken]) -> Token:
+    if isinstance(token, CompactToken):
+        return token.to_schema()
+    return token
+
+
 class WordStatus(str, Enum):
     NEW = "new"
     LEARNED = "learned"
 
 
 class WordCollectionManager(models.Manager):
-    # TODO: Find a way to do batch upsert
-    def add_token(self, user: AbstractUser, token: Token) -> None:
+    def add_tokens(
+        self, user: AbstractUser, tokens: Iterable[Union[Token, CompactToken]]
+    ) -> None:
+        """Bulk version of `add_token`, using a constant number of queries."""
+        words = Word.objects.bulk_from_tokens(tokens)
+        self.add_words(user, words.values())
+
+    def add_words(self, user: AbstractUser, words: Iterable["Word"]) -> None:
+        self.bulk_create(
+            [self.model(user=user, word=word) for word in words],
+            ignore_conflicts=True,
+        )
+
+    def add_token(self, user: AbstractUser, token: Union[Token, CompactToken]) -> None:
         word, _ = Word.objects.from_token(token)
         self.add_word(user, word)
 
@@ -42,10 +60,30 @@ class WordCollection(models.Model):
 
 
 class WordManager(models.Manager):
-    def from_token(self, token: Token) -> Tuple["Word", bool]:
+    def from_token(self, token: Union[Token, CompactToken]) -> Tuple["Word", bool]:
         """Get or create a word entry based on word_id."""
+        token = _as_schema(token)
         return self.get_or_create(word_id=token.word_id, defaults=token.dict())
 
+    def bulk_from_tokens(
+        self, tokens: Iterable[Union[Token, CompactToken]]
+    ) -> Dict[str, "Word"]:
+        """Get or create word entries for many tokens, keyed by word_id."""
+        tokens_by_id = {token.word_id: token for token in tokens}
+        words = self.in_bulk(list(tokens_by_id), field_name="word_id")
+        missing = [
+            self.model(**_as_schema(tokens_by_id[word_id]).dict())
+            for word_id in tokens_by_id.keys() - words.keys()
+        ]
+        if missing:
+            # Rows inserted concurrently by another request are skipped by the
+            # database, so re-read everything that was missing to get the pks.
+            self.bulk_create(missing, ignore_conflicts=True)
+            words.update(
+                self.in_bulk([word.word_id for word in missing], field_name="word_id")
+            )
+        return words
+
 
 class Word(models.Model):
     objects: WordManager = WordManager()
@@ -1,3 +1,53 @@
+from django.contrib.auth.models import User
 from django.test import TestCase
 
-# Create your tests here.
+from src.services.tokenizer.schemas import CompactToken
+from .models import Word, WordCollection
+
+
+def _token(word: str) -> CompactToken:
+    return CompactToken(
+        word=word,
+        word_id=f"test__{word}",
+        reading_form="",
+        normalized_form=word,
+        lemma=word,
+        part_of_speech="名詞",
+    )
+
+
+class AddTokensTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="user")
+        WordCollection.objects.add_token(self.user, _token("学校"))
+
+    def collection(self):
+        return sorted(
+            WordCollection.objects.filter(user=self.user).values_list(
+                "word__word", flat=True
+            )
+        )
+
+    def test_duplicates_and_existing_words(self):
+        tokens = [_token(word) for word in ["学校", "先生", "先生", "猫", "学校"]]
+
+        # Existing words, inserted words (re-read for their pks), collection.
+        with self.assertNumQueries(4):
+            WordCollection.objects.add_tokens(self.user, tokens)
+
+        self.assertEqual(self.collection(), sorted(["学校", "先生", "猫"]))
+        self.assertEqual(Word.objects.count(), 3)
+
+    def test_query_count_does_not_grow_with_the_tokens(self):
+        tokens = [_token(f"単語{i}") for i in range(50)] * 2 + [_token("学校")]
+
+        with self.assertNumQueries(4):
+            WordCollection.objects.add_tokens(self.user, tokens)
+
+        self.assertEqual(len(self.collection()), 51)
+
+    def test_known_words_need_no_insert(self):
+        with self.assertNumQueries(2):
+            WordCollection.objects.add_tokens(self.user, [_token("学校")] * 3)
+
+        self.assertEqual(self.collection(), ["学校"])
@@ -0,0 +1,98 @@
+"""Content-addressed cache of whole-text analysis results.
+
+The same passages are analyzed over and over (demo samples, re-imported chapters),
+so the output of the tokenize + lookup + render pipeline is cached under a hash of
+the text. The key also covers the tokenizer, dictionary and their data versions, so
+upgrading any of them invalidates the cached results.
+"""
+import functools
+import hashlib
+from importlib import metadata
+from typing import Any
+
+from src.services.logging import logger
+
+# Bump when the output of the analysis pipeline changes for the same versions.
+ANALYSIS_VERSION = "2"
+
+_VERSIONED_PACKAGES = ("SudachiPy", "SudachiDict-full", "jamdict", "jamdict-data")
+
+_MISSING = object()
+
+
+def _package_version(name: str) -> str:
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return "-"
+
+
+@functools.lru_cache(maxsize=None)
+def analysis_version() -> str:
+    """Tag of the tokenizer/dictionary setup that produced an analysis."""
+    from django.conf import settings
+
+    parts = [
+        ANALYSIS_VERSION,
+        settings.TOKENIZER_CLASS,
+        settings.JISHO_CLASS,
+        *(f"{name}={_package_version(name)}" for name in _VERSIONED_PACKAGES),
+    ]
+    return "|".join(parts)
+
+
+def analysis_key(kind: str, text: str, split_mode: Any = None) -> str:
+    """Cache key of the `kind` analysis of `text`.
+
+    :param kind: Which pipeline produced the result, e.g. "demo".
+    :param split_mode: Tokenizer split mode, if not the default one.
+    """
+    digest = hashlib.sha256()
+    for part in (analysis_version(), kind, str(split_mode), text):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return f"analysis:{kind}:{digest.hexdigest()}"
+
+
+def _cache():
+    from django.conf import settings
+    from django.core.cache import caches
+
+    return caches[settings.ANALYSIS_CACHE_ALIAS]
+
+
+def _is_cacheable(text: str) -> bool:
+    """Whether results of `text` go to the cache; long texts would bloat its table."""
+    from django.conf import settings
+
+    return bool(settings.ANALYSIS_CACHE_ALIAS) and (
+        len(text) <= settings.ANALYSIS_CACHE_MAX_TEXT_LENGTH
+    )
+
+
+def get_analysis(kind: str, text: str, split_mode: Any = None) -> Any:
+    """Cached result of the analysis of `text`, or None."""
+    if not _is_cacheable(text):
+        return None
+    try:
+        result = _cache().get(analysis_key(kind, text, split_mode), _MISSING)
+    except Exception as e:
+        logger.warning(f"Analysis cache unavailable: {e}")
+        return None
+    return None if result is _MISSING else result
+
+
+def set_analysis(kind: str, text: str, result: Any, split_mode: Any = None) -> None:
+    """Cache the analysis of `text`, unless it is longer than the configured limit."""
+    from django.conf import settings
+
+    if not _is_cacheable(text):
+        return
+    try:
+        _cache().set(
+            analysis_key(kind, text, split_mode),
+            result,
+            settings.ANALYSIS_CACHE_TIMEOUT,
+        )
+    except Exception as e:
+        logger.warning(f"Analysis cache unavailable: {e}")
@@ -1 +0,0 @@
-from .states import DefaultJisho
@@ -1,19 +1,43 @@
 from abc import ABC, abstractclassmethod
-from typing import List
+from typing import Any, Dict, Iterable, List, Union
 
 
+from .cache import get_lookup_cache
 from .schemas import Entry
-from src.services.tokenizer.base import Token, Tokenizer
-from src.services.tokenizer.sudachi import SudachiTokenizer
+from src.services.tokenizer.base import Token
+from src.services.tokenizer.schemas import CompactToken
 
 
 class AbstractJisho(ABC):
-    _tokenizer: Tokenizer = SudachiTokenizer()
+    @classmethod
+    def load(cls):
+        """Load the dictionary ahead of the first lookup (e.g. to preload it)."""
+
+    @classmethod
+    def cache_stats(cls) -> Dict[str, Any]:
+        """Hit-rate metrics of the lookup cache (see `cache.cached_lookup`)."""
+        return get_lookup_cache().stats()
 
     @classmethod
-    def lookup_token(cls, token: Token, **kwargs) -> List[Entry]:
+    def lookup_token(cls, token: Union[Token, CompactToken], **kwargs) -> List[Entry]:
         return cls.lookup(token.normalized_form, **kwargs)
 
+    @classmethod
+    def lookup_tokens(
+        cls, tokens: Iterable[Union[Token, CompactToken]], **kwargs
+    ) -> Dict[str, List[Entry]]:
+        """Look up many tokens at once, returning a mapping normalized form -> entries."""
+        return cls.lookup_many((tkn.normalized_form for tkn in tokens), **kwargs)
+
+    @classmethod
+    def lookup_many(cls, words: Iterable[str], **kwargs) -> Dict[str, List[Entry]]:
+        """Look up many words at once, returning a mapping word -> entries.
+
+        Backends should override this to resolve the words with a few batched queries;
+        the default falls back to one `lookup` per word.
+        """
+        return {word: cls.lookup(word, **kwargs) for word in dict.fromkeys(words)}
+
     @abstractclassmethod
     def lookup(cls, word: str, **kwargs) -> List[Entry]:
         raise NotImplementedError
@@ -0,0 +1,199 @@
+import functools
+import hashlib
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from src.services.cache import LRUCache
+from src.services.logging import logger
+from .schemas import Entry
+
+_MISSING = object()
+
+
+class LookupCache:
+    """Two-tier cache of dictionary lookups.
+
+    The first tier is a per-process LRU. The optional second tier is a Django cache
+    alias (e.g. a database or memcached cache) shared by every worker. Words without
+    entries are cached as an empty list, so misses are not looked up again.
+    """
+
+    def __init__(self, maxsize: int, alias: str = None, timeout: int = None):
+        self.local = LRUCache(maxsize=maxsize)
+        self.alias = alias
+        self.timeout = timeout
+        self.shared_hits = 0
+        self.shared_misses = 0
+        self.shared_errors = 0
+
+    @property
+    def shared(self):
+        from django.core.cache import caches
+
+        return caches[self.alias] if self.alias else None
+
+    @staticmethod
+    def shared_key(key: str) -> str:
+        # Dictionary words are not valid memcached keys, so hash them.
+        return "jisho:" + hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Any:
+        entries = self.local.get(key, _MISSING)
+        if entries is not _MISSING or not self.alias:
+            return entries
+        try:
+            entries = self.shared.get(self.shared_key(key), _MISSING)
+        except Exception as e:
+            self.shared_errors += 1
+            logger.warning(f"Dictionary cache '{self.alias}' unavailable: {e}")
+            return _MISSING
+        if entries is _MISSING:
+            self.shared_misses += 1
+        else:
+            self.shared_hits += 1
+            self.local.set(key, entries)
+        return entries
+
+    def set(self, key: str, entries: List[Entry]):
+        self.local.set(key, entries)
+        if not self.alias:
+            return
+        try:
+            self.shared.set(self.shared_key(key), entries, self.timeout)
+        except Exception as e:
+            self.shared_errors += 1
+            logger.warning(f"Dictionary cache '{self.alias}' unavailable: {e}")
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Cached entries of `keys`, reading the shared tier in one round trip."""
+        found = {}
+        missing = []
+        for key in keys:
+            entries = self.local.get(key, _MISSING)
+            if entries is _MISSING:
+                missing.append(key)
+            else:
+                found[key] = entries
+        if not missing or not self.alias:
+            return found
+        shared_keys = {self.shared_key(key): key for key in missing}
+        try:
+            shared = self.shared.get_many(shared_keys)
+        except Exception as e:
+            self.shared_errors += 1
+            logger.warning(f"Dictionary cache '{self.alias}' unavailable: {e}")
+            return found
+        self.shared_hits += len(shared)
+        self.shared_misses += len(missing) - len(shared)
+        for shared_key, entries in shared.items():
+            key = shared_keys[shared_key]
+            self.local.set(key, entries)
+            found[key] = entries
+        return found
+
+    def set_many(self, entries_by_key: Dict[str, List[Entry]]):
+        for key, entries in entries_by_key.items():
+            self.local.set(key, entries)
+        if not self.alias or not entries_by_key:
+            return
+        try:
+            self.shared.set_many(
+                {
+                    self.shared_key(key): entries
+                    for key, entries in entries_by_key.items()
+                },
+                self.timeout,
+            )
+        except Exception as e:
+            self.shared_errors += 1
+            logger.warning(f"Dictionary cache '{self.alias}' unavailable: {e}")
+
+    def clear(self):
+        self.local.clear()
+        self.shared_hits = self.shared_misses = self.shared_errors = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.shared_hits + self.shared_misses
+        return {
+            "local": self.local.stats(),
+            "shared": {
+                "alias": self.alias,
+                "hits": self.shared_hits,
+                "misses": self.shared_misses,
+                "errors": self.shared_errors,
+                "hit_rate": self.shared_hits / lookups if lookups else 0.0,
+            },
+        }
+
+
+_lookup_cache: Optional[LookupCache] = None
+_lookup_cache_lock = threading.Lock()
+
+
+def get_lookup_cache() -> LookupCache:
+    """Process-wide lookup cache, configured by the `JISHO_CACHE_*` settings."""
+    global _lookup_cache
+    if _lookup_cache is None:
+        from django.conf import settings
+
+        with _lookup_cache_lock:
+            if _lookup_cache is None:
+                _lookup_cache = LookupCache(
+                    maxsize=settings.JISHO_CACHE_SIZE,
+                    alias=settings.JISHO_CACHE_ALIAS,
+                    timeout=settings.JISHO_CACHE_TIMEOUT,
+                )
+    return _lookup_cache
+
+
+def _cache_key(cls, word: str, kwargs: Dict) -> str:
+    return f"{cls.__name__}:{word}:{sorted(kwargs.items())}"
+
+
+def cached_lookup(func: Callable) -> Callable:
+    """Cache the entries returned by a jisho's `lookup(cls, word, **kwargs)`."""
+
+    @functools.wraps(func)
+    def wrapper(cls, word: str, **kwargs) -> List[Entry]:
+        cache = get_lookup_cache()
+        key = _cache_key(cls, word, kwargs)
+        entries = cache.get(key)
+        if entries is _MISSING:
+            entries = func(cls, word, **kwargs)
+            cache.set(key, entries)
+        # Callers may extend the list, so never hand out the cached one.
+        return list(entries)
+
+    return wrapper
+
+
+def cached_lookup_many(func: Callable) -> Callable:
+    """Cache a jisho's `lookup_many(cls, words, **kwargs)` word by word.
+
+    Only the words missing from the cache are passed on to `func`, and the cache is
+    shared with `cached_lookup`.
+    """
+
+    @functools.wraps(func)
+    def wrapper(cls, words: Iterable[str], **kwargs) -> Dict[str, List[Entry]]:
+        cache = get_lookup_cache()
+        keys = {word: _cache_key(cls, word, kwargs) for word in words}
+        cached = cache.get_many(keys.values())
+        result = {}
+        missing = []
+        for word, key in keys.items():
+            if key in cached:
+                result[word] = list(cached[key])
+            else:
+                missing.append(word)
+        if missing:
+            found = func(cls, missing, **kwargs)
+            new_entries = {word: found.get(word, []) for word in missing}
+            cache.set_many(
+                {keys[word]: entries for word, entries in new_entries.items()}
+            )
+            for word, entries in new_entries.items():
+                result[word] = list(entries)
+        return result
+
+    return wrapper
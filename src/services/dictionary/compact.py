@@ -0,0 +1,39 @@
+import threading
+from typing import Dict, Iterable, List
+
+from .base import AbstractJisho
+from .cache import cached_lookup, cached_lookup_many
+from .index import CompactIndex
+from .schemas import Entry
+
+
+class CompactJisho(AbstractJisho):
+    """Dictionary backed by the memory-mapped index of `manage.py build_jmdict_index`.
+
+    Only exact matches of kanji forms, kana forms and `id#<idseq>` are supported;
+    Jamdict's wildcard and gloss searches are not.
+    """
+
+    _index = None
+    _index_lock = threading.Lock()
+
+    @classmethod
+    def load(cls) -> CompactIndex:
+        if cls._index is None:
+            from django.conf import settings
+
+            with cls._index_lock:
+                if cls._index is None:
+                    cls._index = CompactIndex(settings.JMDICT_INDEX_PATH)
+        return cls._index
+
+    @classmethod
+    @cached_lookup
+    def lookup(cls, word: str, **kwargs) -> List[Entry]:
+        return cls.load().get(word)
+
+    @classmethod
+    @cached_lookup_many
+    def lookup_many(cls, words: Iterable[str], **kwargs) -> Dict[str, List[Entry]]:
+        index = cls.load()
+        return {word: index.get(word) for word in words}
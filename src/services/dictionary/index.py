@@ -0,0 +1,161 @@
+"""Compact, memory-mappable JMdict index.
+
+File layout (little-endian)::
+
+    header   magic, version, bucket count, offsets of the three sections below
+    buckets  (n_buckets + 1) uint32 offsets into `records`; bucket `i` holds the
+             records between buckets[i] and buckets[i + 1]
+    records  per key: uint16 key length, UTF-8 key, uint16 posting count,
+             uint32 offsets into `entries` (in idseq order)
+    entries  per entry: uint32 length, compact JSON
+
+Keys are the kanji forms, kana forms and `id#<idseq>` of every entry, hashed into
+buckets with CRC-32, so a lookup reads a single bucket straight from the mapped pages.
+"""
+import json
+import mmap
+import os
+import struct
+import tempfile
+import zlib
+from collections import defaultdict
+from typing import Dict, Iterable, List
+
+from .schemas import Entry, Sense
+
+MAGIC = b"JHJMDIDX"
+VERSION = 1
+_HEADER = struct.Struct("<8sIIQQQ")
+_U16 = struct.Struct("<H")
+_U32 = struct.Struct("<I")
+
+
+def _bucket(key: bytes, n_buckets: int) -> int:
+    return zlib.crc32(key) % n_buckets
+
+
+def _encode_entry(entry: Entry) -> bytes:
+    data = [
+        entry.idseq,
+        entry.kanji_forms,
+        entry.kana_forms,
+        [[sense.glosses, sense.pos] for sense in entry.senses],
+    ]
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _decode_entry(data: bytes) -> Entry:
+    idseq, kanji_forms, kana_forms, senses = json.loads(data)
+    # Written by `write_index`, so skip pydantic validation.
+    senses = [Sense.construct(glosses=glosses, pos=pos) for glosses, pos in senses]
+    return Entry.construct(
+        idseq=idseq,
+        kanji_forms=kanji_forms,
+        kana_forms=kana_forms,
+        translations=[sense.to_text() for sense in senses],
+        senses=senses,
+    )
+
+
+def write_index(path: str, entries: Iterable[Entry]) -> Dict[str, int]:
+    """Write `entries` (in idseq order) to an index file at `path`.
+
+    The file is written next to `path` and moved into place, so processes that have
+    the previous index mapped keep reading a consistent file.
+    """
+    entry_data = bytearray()
+    postings = defaultdict(list)
+    n_entries = 0
+    for entry in entries:
+        offset = len(entry_data)
+        data = _encode_entry(entry)
+        entry_data += _U32.pack(len(data)) + data
+        keys = [*entry.kanji_forms, *entry.kana_forms, f"id#{entry.idseq}"]
+        for key in dict.fromkeys(keys):
+            postings[key.encode("utf-8")].append(offset)
+        n_entries += 1
+
+    n_buckets = max(1, len(postings))
+    buckets = defaultdict(list)
+    for key in postings:
+        buckets[_bucket(key, n_buckets)].append(key)
+    record_data = bytearray()
+    bucket_offsets = []
+    for i in range(n_buckets):
+        bucket_offsets.append(len(record_data))
+        for key in buckets.get(i, ()):
+            offsets = postings[key]
+            record_data += _U16.pack(len(key)) + key + _U16.pack(len(offsets))
+            record_data += struct.pack(f"<{len(offsets)}I", *offsets)
+    bucket_offsets.append(len(record_data))
+    bucket_data = struct.pack(f"<{len(bucket_offsets)}I", *bucket_offsets)
+
+    buckets_off = _HEADER.size
+    records_off = buckets_off + len(bucket_data)
+    entries_off = records_off + len(record_data)
+    header = _HEADER.pack(
+        MAGIC, VERSION, n_buckets, buckets_off, records_off, entries_off
+    )
+    directory = os.path.dirname(os.path.abspath(path))
+    with tempfile.NamedTemporaryFile(dir=directory, delete=False) as f:
+        for chunk in (header, bucket_data, record_data, entry_data):
+            f.write(chunk)
+    os.chmod(f.name, 0o644)
+    os.replace(f.name, path)
+    return {
+        "entries": n_entries,
+        "keys": len(postings),
+        "bytes": entries_off + len(entry_data),
+    }
+
+
+class CompactIndex:
+    """Read-only view of an index file written by `write_index`."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (
+            magic,
+            version,
+            n_buckets,
+            buckets_off,
+            records_off,
+            entries_off,
+        ) = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a JMdict index (version {VERSION}).")
+        self._n_buckets = n_buckets
+        self._buckets_off = buckets_off
+        self._records_off = records_off
+        self._entries_off = entries_off
+
+    def close(self):
+        self._mmap.close()
+
+    def _entry_offsets(self, key: bytes) -> List[int]:
+        buf = self._mmap
+        position = self._buckets_off + _bucket(key, self._n_buckets) * 4
+        start, end = struct.unpack_from("<II", buf, position)
+        position = self._records_off + start
+        end += self._records_off
+        while position < end:
+            (key_len,) = _U16.unpack_from(buf, position)
+            position += 2
+            record_key = buf[position : position + key_len]
+            position += key_len
+            (n_offsets,) = _U16.unpack_from(buf, position)
+            position += 2
+            if record_key == key:
+                return struct.unpack_from(f"<{n_offsets}I", buf, position)
+            position += 4 * n_offsets
+        return ()
+
+    def get(self, word: str) -> List[Entry]:
+        buf = self._mmap
+        entries = []
+        for offset in self._entry_offsets(word.encode("utf-8")):
+            position = self._entries_off + offset
+            (length,) = _U32.unpack_from(buf, position)
+            entries.append(_decode_entry(buf[position + 4 : position + 4 + length]))
+        return entries
@@ -1,24 +1,186 @@
-from typing import Dict
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List
 
 from jamdict import Jamdict
 from jamdict.jmdict import JMDEntry
 
 from .base import AbstractJisho
-from .schemas import Entry
+from .cache import cached_lookup, cached_lookup_many
+from .schemas import Entry, Sense
+
+# Words per batched query; each word is bound three times in `_MATCH_QUERY`, which
+# keeps every query below SQLite's default limit of 999 parameters.
+_BATCH_SIZE = 300
+
+# Same matching rules as Jamdict's exact (non-wildcard) lookup.
+_MATCH_QUERY = """
+SELECT text, idseq FROM Kanji WHERE text IN ({params})
+UNION SELECT text, idseq FROM Kana WHERE text IN ({params})
+UNION SELECT SenseGloss.text, Sense.idseq FROM Sense
+    JOIN SenseGloss ON Sense.ID = SenseGloss.sid
+    WHERE SenseGloss.text IN ({params})
+"""
+
+
+def _batched(items: List, size: int = _BATCH_SIZE) -> Iterable[List]:
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def _gloss_text(text: str, lang: str, gend: str) -> str:
+    # Same format as `jamdict.jmdict.SenseGloss.__str__`.
+    parts = [text]
+    if lang and lang != "eng":
+        parts.append(f"(lang:{lang})")
+    if gend:
+        parts.append(f"(gend:{gend})")
+    return " ".join(parts)
 
 
 class JamdictJisho(AbstractJisho):
-    _jisho = Jamdict()
+    _jisho = None
+    _jisho_lock = threading.Lock()
+
+    @classmethod
+    def load(cls) -> Jamdict:
+        if cls._jisho is None:
+            with cls._jisho_lock:
+                if cls._jisho is None:
+                    cls._jisho = Jamdict()
+        return cls._jisho
 
     @classmethod
-    def lookup(cls, word: str, **kwargs):
-        result = cls._jisho.lookup(word, **kwargs)
+    @cached_lookup
+    def lookup(cls, word: str, **kwargs) -> List[Entry]:
+        result = cls.load().lookup(word, **kwargs)
         return [cls._wrap_jmdict_entry(entry) for entry in result.entries]
 
+    @classmethod
+    @cached_lookup_many
+    def lookup_many(cls, words: Iterable[str], **kwargs) -> Dict[str, List[Entry]]:
+        """Resolve all words with a handful of set-based queries on the JMdict tables.
+
+        Jamdict's wildcard searches and lookup options are not supported in batch,
+        so those fall back to one `lookup` per word.
+        """
+        words = list(words)
+        if kwargs:
+            return super().lookup_many(words, **kwargs)
+        plain_words = []
+        result = {}
+        for word in words:
+            if "%" in word or "_" in word or "@" in word:
+                result[word] = cls.lookup(word)
+            else:
+                plain_words.append(word)
+
+        with cls.load().jmdict.ctx() as ctx:
+            cursor = ctx.conn.cursor()
+            word_idseqs = cls._match_idseqs(cursor, plain_words)
+            all_idseqs = sorted({i for idseqs in word_idseqs.values() for i in idseqs})
+            entries = cls._fetch_entries(cursor, all_idseqs)
+
+        for word in plain_words:
+            result[word] = [
+                entries[idseq]
+                for idseq in sorted(word_idseqs.get(word, ()))
+                if idseq in entries
+            ]
+        return result
+
+    @classmethod
+    def iter_entries(cls) -> Iterator[Entry]:
+        """Every JMdict entry, in idseq order."""
+        with cls.load().jmdict.ctx() as ctx:
+            cursor = ctx.conn.cursor()
+            idseqs = [
+                idseq
+                for (idseq,) in cursor.execute("SELECT idseq FROM Entry ORDER BY idseq")
+            ]
+            for batch in _batched(idseqs):
+                yield from cls._fetch_entries(cursor, batch).values()
+
+    @staticmethod
+    def _match_idseqs(cursor, words: List[str]) -> Dict[str, set]:
+        word_idseqs = defaultdict(set)
+        id_words = {}
+        text_words = []
+        for word in words:
+            if word.startswith("id#") and word[3:].isdigit():
+                id_words[int(word[3:])] = word
+            else:
+                text_words.append(word)
+        for batch in _batched(text_words):
+            query = _MATCH_QUERY.format(params=",".join("?" * len(batch)))
+            for text, idseq in cursor.execute(query, batch * 3):
+                word_idseqs[text].add(idseq)
+        for batch in _batched(list(id_words)):
+            query = (
+                f"SELECT idseq FROM Entry WHERE idseq IN ({','.join('?' * len(batch))})"
+            )
+            for (idseq,) in cursor.execute(query, batch):
+                word_idseqs[id_words[idseq]].add(idseq)
+        return word_idseqs
+
+    @staticmethod
+    def _fetch_entries(cursor, idseqs: List[int]) -> Dict[int, Entry]:
+        kanji_forms = defaultdict(list)
+        kana_forms = defaultdict(list)
+        senses = defaultdict(list)
+        sense_by_id = {}
+        for batch in _batched(idseqs):
+            params = ",".join("?" * len(batch))
+            for idseq, text in cursor.execute(
+                f"SELECT idseq, text FROM Kanji WHERE idseq IN ({params}) ORDER BY ID",
+                batch,
+            ):
+                kanji_forms[idseq].append(text)
+            for idseq, text in cursor.execute(
+                f"SELECT idseq, text FROM Kana WHERE idseq IN ({params}) ORDER BY ID",
+                batch,
+            ):
+                kana_forms[idseq].append(text)
+            for sid, idseq in cursor.execute(
+                f"SELECT ID, idseq FROM Sense WHERE idseq IN ({params}) ORDER BY ID",
+                batch,
+            ):
+                sense = Sense(glosses=[], pos=[])
+                sense_by_id[sid] = sense
+                senses[idseq].append(sense)
+            for sid, text in cursor.execute(
+                f"SELECT pos.sid, pos.text FROM pos JOIN Sense ON Sense.ID = pos.sid "
+                f"WHERE Sense.idseq IN ({params}) ORDER BY pos.rowid",
+                batch,
+            ):
+                sense_by_id[sid].pos.append(text)
+            for sid, text, lang, gend in cursor.execute(
+                f"SELECT g.sid, g.text, g.lang, g.gend FROM SenseGloss g "
+                f"JOIN Sense ON Sense.ID = g.sid "
+                f"WHERE Sense.idseq IN ({params}) ORDER BY g.rowid",
+                batch,
+            ):
+                sense_by_id[sid].glosses.append(_gloss_text(text, lang, gend))
+        return {
+            idseq: Entry(
+                idseq=idseq,
+                kanji_forms=kanji_forms[idseq],
+                kana_forms=kana_forms[idseq],
+                translations=[sense.to_text() for sense in senses[idseq]],
+                senses=senses[idseq],
+            )
+            for idseq in idseqs
+        }
+
     @staticmethod
     def _wrap_jmdict_entry(entry: JMDEntry) -> Entry:
         return Entry(
-            kana_forms=entry.kana_forms,
-            kanji_forms=entry.kanji_forms,
+            idseq=entry.idseq,
+            kana_forms=[str(form) for form in entry.kana_forms],
+            kanji_forms=[str(form) for form in entry.kanji_forms],
             translations=[str(sense) for sense in entry.senses],
+            senses=[
+                Sense(glosses=[str(gloss) for gloss in sense.gloss], pos=sense.pos)
+                for sense in entry.senses
+            ],
         )
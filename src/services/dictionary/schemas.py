@@ -3,7 +3,19 @@ from typing import List
 from pydantic import BaseModel
 
 
+class Sense(BaseModel):
+    glosses: List[str]
+    pos: List[str] = []
+
+    def to_text(self) -> str:
+        """Same format as `jamdict.jmdict.Sense.__str__`."""
+        glosses = "/".join(self.glosses)
+        return f"{glosses} (({'|'.join(self.pos)}))" if self.pos else glosses
+
+
 class Entry(BaseModel):
+    idseq: int
     kanji_forms: List[str]
     kana_forms: List[str]
     translations: List[str]
+    senses: List[Sense] = []
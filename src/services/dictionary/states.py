@@ -1,3 +1,22 @@
-from .jamdict import JamdictJisho
+from typing import Type
+import re
+import importlib
 
-DefaultJisho = JamdictJisho
+from django.utils.functional import SimpleLazyObject
+
+from .base import AbstractJisho
+
+
+def get_jisho() -> Type[AbstractJisho]:
+    from django.conf import settings
+
+    jisho = settings.JISHO_CLASS
+    jisho = re.findall("(.*)\.(.*)$", jisho)
+    assert jisho and len(jisho[0]) == 2
+    pkg_name, cls_name = jisho[0]
+    pkg = importlib.import_module(pkg_name)
+    return getattr(pkg, cls_name)
+
+
+# Resolved on first use, so that importing this package does not load the dictionary.
+DefaultJisho = SimpleLazyObject(get_jisho)
@@ -0,0 +1,55 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from .cache import LookupCache, cached_lookup_many
+
+
+class CountingJisho:
+    looked_up = []
+
+    @classmethod
+    @cached_lookup_many
+    def lookup_many(cls, words, **kwargs):
+        cls.looked_up.append(list(words))
+        return {word: [f"entry of {word}"] for word in words if word != "無"}
+
+
+class CachedLookupManyTest(TestCase):
+    words = ["学校", "先生", "無", "学校", "魔物"]
+
+    def setUp(self):
+        CountingJisho.looked_up = []
+        self.cache = LookupCache(maxsize=100, alias="jisho", timeout=60)
+        patcher = mock.patch(
+            "src.services.dictionary.cache.get_lookup_cache", return_value=self.cache
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_words_are_looked_up_once(self):
+        first = CountingJisho.lookup_many(self.words)
+        second = CountingJisho.lookup_many(self.words)
+
+        self.assertEqual(CountingJisho.looked_up, [["学校", "先生", "無", "魔物"]])
+        self.assertEqual(first, second)
+        self.assertEqual(first["無"], [])
+        self.assertEqual(first["学校"], ["entry of 学校"])
+
+    def test_shared_tier_is_read_in_one_query(self):
+        CountingJisho.lookup_many(self.words)
+        # Another worker: empty local tier, same shared tier.
+        self.cache.local.clear()
+
+        with self.assertNumQueries(1):
+            result = CountingJisho.lookup_many(self.words)
+
+        self.assertEqual(len(CountingJisho.looked_up), 1)
+        self.assertEqual(set(result), set(self.words))
+        self.assertEqual(self.cache.stats()["shared"]["hits"], 4)
+
+    def test_local_tier_needs_no_query(self):
+        CountingJisho.lookup_many(self.words)
+
+        with self.assertNumQueries(0):
+            CountingJisho.lookup_many(self.words)
@@ -0,0 +1,63 @@
+"""Run blocking work from async views without stalling the event loop.
+
+Database queries go through `database_sync_to_async`, which runs them in asgiref's
+thread pool. CPU-bound work (tokenizing, dictionary lookups, rendering) goes through
+`run_cpu_bound`, which uses a small bounded pool, so a few long parse requests
+cannot take every thread away from the readers. Both close the thread's database
+connection like the end of a request would.
+"""
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+_cpu_executor: Optional[ThreadPoolExecutor] = None
+_cpu_executor_lock = threading.Lock()
+
+
+def get_cpu_executor() -> ThreadPoolExecutor:
+    """Process-wide pool for CPU-bound work, sized by `ASYNC_CPU_WORKERS`."""
+    global _cpu_executor
+    if _cpu_executor is None:
+        from django.conf import settings
+
+        with _cpu_executor_lock:
+            if _cpu_executor is None:
+                _cpu_executor = ThreadPoolExecutor(
+                    max_workers=settings.ASYNC_CPU_WORKERS,
+                    thread_name_prefix="cpu-bound",
+                )
+    return _cpu_executor
+
+
+def _with_connection_cleanup(func: Callable) -> Callable:
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return wrapper
+
+
+def database_sync_to_async(func: Callable) -> Callable:
+    """Wrap a function that queries the database into an awaitable one."""
+    return sync_to_async(_with_connection_cleanup(func), thread_sensitive=False)
+
+
+async def run_cpu_bound(func: Callable, *args, **kwargs) -> Any:
+    """Await `func(*args, **kwargs)` run in the bounded CPU pool.
+
+    The function may also query the database (e.g. parsing and saving a notebook).
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_cpu_executor(),
+        functools.partial(_with_connection_cleanup(func), *args, **kwargs),
+    )
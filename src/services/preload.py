@@ -0,0 +1,54 @@
+import time
+from typing import Dict
+
+from .logging import logger
+
+
+def preload_services() -> float:
+    """Build the tokenizer and dictionary singletons, returning the seconds spent.
+
+    Called in the gunicorn master when `preload_app` is on, so that the dictionaries
+    are loaded once and their pages are shared copy-on-write by every forked worker.
+    Nothing here may open a database connection: it would be shared by the workers.
+    """
+    from src.services.tokenizer.states import DefaultTokenizer
+    from src.services.dictionary.states import DefaultJisho
+
+    start = time.perf_counter()
+    # Creates the tokenizer session on top of the (memory-mapped) system dictionary.
+    DefaultTokenizer.tokenize_text("")
+    # Jamdict only opens its SQLite file on the first lookup; the compact index is
+    # memory-mapped, so its pages are shared by every worker.
+    DefaultJisho.load()
+    elapsed = time.perf_counter() - start
+    logger.info(f"Preloaded tokenizer and dictionary in {elapsed:.2f}s.")
+    return elapsed
+
+
+def process_memory() -> Dict[str, int]:
+    """Memory of the current process in kB, as reported by /proc/self/smaps_rollup.
+
+    `Pss` splits shared pages between the processes mapping them, so summing it over
+    the gunicorn workers gives their real footprint, unlike `Rss`.
+    """
+    fields = {
+        "Rss": "rss",
+        "Pss": "pss",
+        "Shared_Clean": "shared_clean",
+        "Shared_Dirty": "shared_dirty",
+        "Private_Clean": "private_clean",
+        "Private_Dirty": "private_dirty",
+    }
+    usage = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if name in fields:
+                    usage[fields[name]] = int(value.split()[0])
+    except OSError:
+        import resource
+
+        # Not on Linux: only the peak RSS is available.
+        usage["rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage
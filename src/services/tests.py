@@ -0,0 +1,45 @@
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from . import analysis
+
+
+@override_settings(ANALYSIS_CACHE_ALIAS="analysis", ANALYSIS_CACHE_MAX_TEXT_LENGTH=10)
+class AnalysisCacheTest(TestCase):
+    def setUp(self):
+        caches["analysis"].clear()
+        analysis.analysis_version.cache_clear()
+        self.addCleanup(analysis.analysis_version.cache_clear)
+
+    def test_result_is_cached_by_text(self):
+        analysis.set_analysis("test", "学校に行く", ["result"])
+
+        self.assertEqual(analysis.get_analysis("test", "学校に行く"), ["result"])
+        self.assertIsNone(analysis.get_analysis("test", "学校に来る"))
+        self.assertIsNone(analysis.get_analysis("other", "学校に行く"))
+
+    def test_long_text_bypasses_the_cache(self):
+        text = "学校に行く" * 3
+
+        with self.assertNumQueries(0):
+            analysis.set_analysis("test", text, ["result"])
+            self.assertIsNone(analysis.get_analysis("test", text))
+
+    def test_version_change_invalidates_results(self):
+        analysis.set_analysis("test", "学校に行く", ["result"])
+
+        with mock.patch.object(analysis, "ANALYSIS_VERSION", "upgraded"):
+            analysis.analysis_version.cache_clear()
+            self.assertIsNone(analysis.get_analysis("test", "学校に行く"))
+
+        analysis.analysis_version.cache_clear()
+        self.assertEqual(analysis.get_analysis("test", "学校に行く"), ["result"])
+
+    def test_package_upgrade_invalidates_results(self):
+        analysis.set_analysis("test", "学校に行く", ["result"])
+
+        with mock.patch.object(analysis, "_package_version", return_value="99.0"):
+            analysis.analysis_version.cache_clear()
+            self.assertIsNone(analysis.get_analysis("test", "学校に行く"))
@@ -1,19 +1,44 @@
 from abc import ABC, abstractmethod
-from typing import List, Any
-from .schemas import Token
+from typing import Iterable, Iterator, List, Union, Any
+from .schemas import CompactToken, Token
 
 
 class Tokenizer(ABC):
     @classmethod
     @abstractmethod
-    def tokenize_text(cls, sentence: str, *args, **kwargs) -> List[Token]:
+    def tokenize_text(cls, sentence: str, *args, **kwargs) -> List[CompactToken]:
         """
         Tokenize a sentence into a list of tokens.
         """
         raise NotImplementedError
 
+    @classmethod
+    def tokenize_stream(
+        cls, lines: Iterable[str], *args, **kwargs
+    ) -> Iterator[List[CompactToken]]:
+        """
+        Lazily tokenize an iterable of lines, yielding one list of tokens per line.
+
+        Subclasses should override this to reuse their tokenizer session across the
+        whole document instead of paying the per-call setup of `tokenize_text`.
+        """
+        for line in lines:
+            yield cls.tokenize_text(line, *args, **kwargs)
+
+    @classmethod
+    def tokenize_many(
+        cls, lines: Iterable[str], *args, **kwargs
+    ) -> List[List[CompactToken]]:
+        """
+        Tokenize a whole document in one pass, returning the tokens of each line in
+        the same order as the input.
+        """
+        return list(cls.tokenize_stream(lines, *args, **kwargs))
+
     @classmethod
     @abstractmethod
-    def normalize_token(cls, token: Token, *args, **kwargs) -> Token:
+    def normalize_token(
+        cls, token: Union[Token, CompactToken], *args, **kwargs
+    ) -> List[CompactToken]:
         """Create a normalized token from input token (i.e. dictionary form)."""
         raise NotImplementedError
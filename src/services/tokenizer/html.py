@@ -0,0 +1,70 @@
+import io
+import threading
+from typing import Iterable, Optional, Union
+
+from .schemas import CompactToken, Token
+
+AnyToken = Union[Token, CompactToken]
+
+
+class HtmlRenderer:
+    """Render tokens to furigana HTML, reusing the fragment of every distinct token.
+
+    The same word always produces the same markup, so fragments are cached per
+    (word_id, surface). The cache is a plain dict: a lookup is cheaper than formatting
+    and escaping the fragment again, which a locked LRU would not be. It is simply
+    emptied when it grows past `maxsize`.
+    """
+
+    def __init__(self, maxsize: int = 65536):
+        self.maxsize = maxsize
+        self._fragments = {}
+
+    def fragment(self, token: AnyToken) -> str:
+        key = (token.word_id, token.word)
+        html = self._fragments.get(key)
+        if html is None:
+            html = token.to_html()
+            if len(self._fragments) >= self.maxsize:
+                self._fragments.clear()
+            self._fragments[key] = html
+        return html
+
+    def render_line(self, tokens: Iterable[AnyToken]) -> str:
+        fragment = self.fragment
+        return "".join([fragment(tkn) for tkn in tokens])
+
+    def render_document(
+        self, lines: Iterable[Iterable[AnyToken]], separator: str = "<br>"
+    ) -> str:
+        """Render the tokens of every line into one buffer, separating lines."""
+        fragment = self.fragment
+        buffer = io.StringIO()
+        write = buffer.write
+        first = True
+        for tokens in lines:
+            if not first:
+                write(separator)
+            first = False
+            for tkn in tokens:
+                write(fragment(tkn))
+        return buffer.getvalue()
+
+    def clear(self):
+        self._fragments.clear()
+
+
+_renderer: Optional[HtmlRenderer] = None
+_renderer_lock = threading.Lock()
+
+
+def get_renderer() -> HtmlRenderer:
+    """Process-wide renderer, sized by `HTML_FRAGMENT_CACHE_SIZE`."""
+    global _renderer
+    if _renderer is None:
+        from django.conf import settings
+
+        with _renderer_lock:
+            if _renderer is None:
+                _renderer = HtmlRenderer(maxsize=settings.HTML_FRAGMENT_CACHE_SIZE)
+    return _renderer
@@ -0,0 +1,113 @@
+import atexit
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Type
+
+from django.utils.module_loading import import_string
+
+from .base import Tokenizer
+from .schemas import CompactToken
+
+# Tokenizer class loaded by each pool process (see `_init_process`)
+_process_tokenizer: Optional[Type[Tokenizer]] = None
+
+
+def _init_process(tokenizer_path: str):
+    global _process_tokenizer
+    _process_tokenizer = import_string(tokenizer_path)
+    # Load the dictionary and create the session once, before the first batch.
+    _process_tokenizer.tokenize_text("")
+
+
+def _tokenize_batch(lines: List[str], args, kwargs) -> List[List[CompactToken]]:
+    return _process_tokenizer.tokenize_many(lines, *args, **kwargs)
+
+
+def _batched(lines: Iterable[str], size: int) -> Iterator[List[str]]:
+    iterator = iter(lines)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class ProcessPoolTokenizer:
+    """Spread tokenization of large documents across a pool of processes.
+
+    Lines are sent to the pool in batches and the results are yielded back in input
+    order, so the output is identical to calling `tokenize_stream` serially. Documents
+    shorter than `min_lines` are tokenized in the calling process.
+    """
+
+    def __init__(
+        self,
+        tokenizer_path: str,
+        max_workers: int = None,
+        batch_size: int = 256,
+        min_lines: int = 1024,
+    ):
+        self.tokenizer_path = tokenizer_path
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.min_lines = min_lines
+        self._executor = None
+        self._futures = set()
+        self._lock = threading.Lock()
+
+    @property
+    def tokenizer(self) -> Type[Tokenizer]:
+        return import_string(self.tokenizer_path)
+
+    def executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # Processes are spawned rather than forked so that they never
+                # inherit locks or connections held by other threads of the server.
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_process,
+                    initargs=(self.tokenizer_path,),
+                )
+                atexit.register(self.shutdown)
+            return self._executor
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                # `shutdown(cancel_futures=True)` needs Python 3.9, so the batches
+                # that have not started yet are cancelled here.
+                for future in self._futures:
+                    future.cancel()
+                self._futures.clear()
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+    def tokenize_stream(
+        self, lines: Iterable[str], *args, **kwargs
+    ) -> Iterator[List[CompactToken]]:
+        lines = list(lines)
+        if len(lines) < self.min_lines:
+            yield from self.tokenizer.tokenize_stream(lines, *args, **kwargs)
+            return
+        executor = self.executor()
+        futures = [
+            executor.submit(_tokenize_batch, batch, args, kwargs)
+            for batch in _batched(lines, self.batch_size)
+        ]
+        with self._lock:
+            self._futures.update(futures)
+        try:
+            for future in futures:
+                yield from future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+            with self._lock:
+                self._futures.difference_update(futures)
+
+    def tokenize_many(self, lines: Iterable[str], *args, **kwargs):
+        return list(self.tokenize_stream(lines, *args, **kwargs))
@@ -1,4 +1,5 @@
 from enum import Enum
+from typing import NamedTuple
 
 from pydantic import BaseModel
 
@@ -38,23 +39,17 @@ class PartOfSpeech(str, Enum):
         return cls(pos_val) in cls.noteworthy_pos()
 
 
-class Token(BaseModel):
+class TokenMixin:
+    """Helpers shared by `Token` and `CompactToken`."""
+
+    __slots__ = ()
+
     def __repr__(self):
         return f"<{self.__class__.__name__}: {self.word}({self.part_of_speech})>"
 
     def __str__(self):
         return f"{self.word}({self.part_of_speech})"
 
-    word: str
-    word_id: str
-    reading_form: str
-    normalized_form: str
-    lemma: str
-    part_of_speech: str
-    kanji: str = ""
-    furigana: str = ""
-    okurigana: str = ""
-
     @property
     def only_contains_japanese_chars(self):
         return utils.check_only_japanese_chars(self.word)
@@ -83,3 +78,41 @@ class Token(BaseModel):
             )
         else:
             return utils.write_normal_html(self.word)
+
+
+class Token(TokenMixin, BaseModel):
+    word: str
+    word_id: str
+    reading_form: str
+    normalized_form: str
+    lemma: str
+    part_of_speech: str
+    kanji: str = ""
+    furigana: str = ""
+    okurigana: str = ""
+
+
+class _CompactTokenFields(NamedTuple):
+    word: str
+    word_id: str
+    reading_form: str
+    normalized_form: str
+    lemma: str
+    part_of_speech: str
+    kanji: str = ""
+    furigana: str = ""
+    okurigana: str = ""
+
+
+class CompactToken(TokenMixin, _CompactTokenFields):
+    """Lightweight, immutable token used on the tokenizer hot path.
+
+    Tokenizers produce these instead of `Token` to skip pydantic validation for every
+    morpheme; convert with `to_schema()` only where a validated `Token` is needed
+    (e.g. when persisting a `Word` or returning it from the API).
+    """
+
+    __slots__ = ()
+
+    def to_schema(self) -> Token:
+        return Token(**self._asdict())
@@ -1,8 +1,11 @@
-from typing import Type
+from typing import Type, Union
 import re
 import importlib
 
+from django.utils.functional import SimpleLazyObject
+
 from .base import Tokenizer
+from .pool import ProcessPoolTokenizer
 
 
 def get_tokenizer() -> Type[Tokenizer]:
@@ -16,4 +19,28 @@ def get_tokenizer() -> Type[Tokenizer]:
     return getattr(pkg, cls_name)
 
 
-DefaultTokenizer = get_tokenizer()
+def get_tokenizer_backend() -> Union[Type[Tokenizer], ProcessPoolTokenizer]:
+    """Return the object used to tokenize whole documents.
+
+    `serial` tokenizes in the calling process, `process` spreads large documents over
+    a pool of processes that each load the tokenizer dictionary once.
+    """
+    from django.conf import settings
+
+    backend = settings.TOKENIZER_BACKEND
+    if backend == "serial":
+        return get_tokenizer()
+    if backend == "process":
+        return ProcessPoolTokenizer(
+            settings.TOKENIZER_CLASS,
+            max_workers=settings.TOKENIZER_POOL_WORKERS,
+            batch_size=settings.TOKENIZER_POOL_BATCH_SIZE,
+            min_lines=settings.TOKENIZER_POOL_MIN_LINES,
+        )
+    raise ValueError(f"Unknown TOKENIZER_BACKEND: {backend}")
+
+
+# Resolved on first use, so that importing the models (e.g. for `manage.py migrate`)
+# does not import the tokenizer implementation and its dictionary.
+DefaultTokenizer = SimpleLazyObject(get_tokenizer)
+DefaultTokenizerBackend = SimpleLazyObject(get_tokenizer_backend)
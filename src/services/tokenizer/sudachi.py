@@ -1,12 +1,14 @@
+import threading
 from enum import Enum
-from typing import List, Tuple
+from typing import Iterable, Iterator, List, Tuple, Union
 
 from sudachipy import tokenizer, dictionary
 import sudachipy
 
+from src.services.cache import LRUCache
 from . import utils
 from .base import Tokenizer
-from .schemas import Token
+from .schemas import CompactToken, Token
 
 
 class SudachiSplitMode(Enum):
@@ -16,41 +18,108 @@ class SudachiSplitMode(Enum):
 
 
 class SudachiTokenizer(Tokenizer):
-    _tokenizer = dictionary.Dictionary(dict_type="full").create()
+    _dictionary = None
+    _dictionary_lock = threading.Lock()
+    _sessions = threading.local()
+    _token_cache = None
+
+    @classmethod
+    def dictionary(cls) -> dictionary.Dictionary:
+        """System dictionary, loaded on first use rather than at import time."""
+        if cls._dictionary is None:
+            with cls._dictionary_lock:
+                if cls._dictionary is None:
+                    cls._dictionary = dictionary.Dictionary(dict_type="full")
+        return cls._dictionary
+
+    @classmethod
+    def _session(cls) -> tokenizer.Tokenizer:
+        """Sudachi tokenizer owned by the current worker thread.
+
+        Sudachi tokenizers keep lattice state between calls and must not be shared
+        across threads, so each thread lazily creates its own from the shared
+        dictionary and reuses it for every document it processes.
+        """
+        session = getattr(cls._sessions, "tokenizer", None)
+        if session is None:
+            session = cls.dictionary().create()
+            cls._sessions.tokenizer = session
+        return session
+
+    @classmethod
+    def token_cache(cls) -> LRUCache:
+        """Per-process cache of wrapped tokens, sized by `TOKENIZER_CACHE_SIZE`."""
+        if cls._token_cache is None:
+            from django.conf import settings
+
+            cls._token_cache = LRUCache(maxsize=settings.TOKENIZER_CACHE_SIZE)
+        return cls._token_cache
 
     @classmethod
     def tokenize_text(
         cls,
         sentence: str,
         split_mode: SudachiSplitMode = SudachiSplitMode.MODE_C,
-    ) -> List[Token]:
+    ) -> List[CompactToken]:
         return [
-            cls._wrap_morpheme(morpheme)
-            for morpheme in cls._tokenizer.tokenize(sentence, split_mode)
+            cls._wrap_morpheme(morpheme, split_mode)
+            for morpheme in cls._session().tokenize(sentence, split_mode)
         ]
 
+    @classmethod
+    def tokenize_stream(
+        cls,
+        lines: Iterable[str],
+        split_mode: SudachiSplitMode = SudachiSplitMode.MODE_C,
+    ) -> Iterator[List[CompactToken]]:
+        tokenize = cls._session().tokenize
+        wrap = cls._wrap_morpheme
+        for line in lines:
+            yield [
+                wrap(morpheme, split_mode) for morpheme in tokenize(line, split_mode)
+            ]
+
     @classmethod
     def normalize_token(
         cls,
-        token: Token,
+        token: Union[Token, CompactToken],
+        split_mode: SudachiSplitMode = SudachiSplitMode.MODE_C,
+    ) -> List[CompactToken]:
+        morphemes = cls._session().tokenize(token.normalized_form, split_mode)
+        return [cls._wrap_morpheme(morpheme, split_mode) for morpheme in morphemes]
+
+    @classmethod
+    def _wrap_morpheme(
+        cls,
+        morpheme: sudachipy.morpheme.Morpheme,
         split_mode: SudachiSplitMode = SudachiSplitMode.MODE_C,
-    ) -> List[Token]:
-        morphemes = cls._tokenizer.tokenize(token.normalized_form, split_mode)
-        return [cls._wrap_morpheme(morpheme) for morpheme in morphemes]
+    ) -> CompactToken:
+        """Build a token for a morpheme, reusing a cached one when possible."""
+        surface = morpheme.surface()
+        word_id = morpheme.word_id()
+        cache = cls.token_cache()
+        key = (surface, word_id, split_mode)
+        token = cache.get(key)
+        if token is None:
+            token = cls._build_token(morpheme, surface, word_id)
+            cache.set(key, token)
+        return token
 
     @classmethod
-    def _wrap_morpheme(cls, morpheme: sudachipy.morpheme.Morpheme) -> Token:
+    def _build_token(
+        cls, morpheme: sudachipy.morpheme.Morpheme, surface: str, word_id: int
+    ) -> CompactToken:
         kanji, furigana, okurigana = cls._parse_kanji_furigana_okurigana(morpheme)
-        return Token(
-            word=morpheme.surface(),
-            word_id=f"sudachi__{morpheme.word_id()}",
-            reading_form=morpheme.reading_form(),
-            normalized_form=morpheme.normalized_form(),
-            lemma=morpheme.dictionary_form(),
-            part_of_speech=morpheme.part_of_speech()[0],
-            kanji=kanji,
-            furigana=furigana,
-            okurigana=okurigana,
+        return CompactToken(
+            surface,
+            f"sudachi__{word_id}",
+            morpheme.reading_form(),
+            morpheme.normalized_form(),
+            morpheme.dictionary_form(),
+            morpheme.part_of_speech()[0],
+            kanji,
+            furigana,
+            okurigana,
         )
 
     @staticmethod
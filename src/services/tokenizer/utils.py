@@ -1,13 +1,87 @@
+import re
+from html import escape
+
 import jaconv
-import unicodedata
+
+# Codepoint ranges (inclusive) of every character whose Unicode name contains
+# "CJK UNIFIED IDEOGRAPH", "HIRAGANA" or "KATAKANA". Ideograph ranges cover whole
+# blocks so that characters added by newer Unicode versions are also recognized.
+_KANJI_RANGES = (
+    (0x3400, 0x4DBF),  # CJK Unified Ideographs Extension A
+    (0x4E00, 0x9FFF),  # CJK Unified Ideographs
+    (0x1F210, 0x1F212),  # Squared CJK Unified Ideographs
+    (0x1F214, 0x1F23B),
+    (0x1F240, 0x1F248),  # Tortoise shell bracketed CJK Unified Ideographs
+    (0x20000, 0x2A6DF),  # CJK Unified Ideographs Extension B
+    (0x2A700, 0x2EBEF),  # CJK Unified Ideographs Extension C to F
+    (0x30000, 0x323AF),  # CJK Unified Ideographs Extension G and H
+)
+_HIRAGANA_RANGES = (
+    (0x3041, 0x3096),
+    (0x3099, 0x30A0),  # (semi-)voiced sound marks shared with katakana
+    (0x30FC, 0x30FC),  # KATAKANA-HIRAGANA PROLONGED SOUND MARK
+    (0xFF70, 0xFF70),
+    (0x1B001, 0x1B001),
+    (0x1B11F, 0x1B11F),
+    (0x1B150, 0x1B152),
+    (0x1F200, 0x1F200),
+)
+_KATAKANA_RANGES = (
+    (0x3099, 0x309C),
+    (0x30A0, 0x30FF),
+    (0x31F0, 0x31FF),
+    (0x32D0, 0x32FE),  # Circled katakana
+    (0xFF65, 0xFF9F),  # Halfwidth katakana
+    (0x1AFF0, 0x1AFF3),
+    (0x1AFF5, 0x1AFFB),
+    (0x1AFFD, 0x1AFFE),
+    (0x1B000, 0x1B000),
+    (0x1B120, 0x1B122),
+    (0x1B164, 0x1B167),
+    (0x1F201, 0x1F202),
+    (0x1F213, 0x1F213),
+)
+
+_KANJI = 1
+_HIRAGANA = 2
+_KATAKANA = 4
+
+
+def _build_char_class_table() -> bytes:
+    """Bitmap of character-class flags indexed by codepoint."""
+    size = 1 + max(
+        end for _, end in _KANJI_RANGES + _HIRAGANA_RANGES + _KATAKANA_RANGES
+    )
+    table = bytearray(size)
+    for start, end in _KANJI_RANGES:
+        table[start : end + 1] = bytes([_KANJI]) * (end + 1 - start)
+    for flag, ranges in ((_HIRAGANA, _HIRAGANA_RANGES), (_KATAKANA, _KATAKANA_RANGES)):
+        for start, end in ranges:
+            for cp in range(start, end + 1):
+                table[cp] |= flag
+    return bytes(table)
+
+
+def _char_class_pattern(*ranges) -> str:
+    return "".join(
+        f"\\U{start:08x}-\\U{end:08x}" for group in ranges for start, end in group
+    )
+
+
+_CHAR_CLASSES = _build_char_class_table()
+_TABLE_SIZE = len(_CHAR_CLASSES)
+_KANJI_RE = re.compile(f"[{_char_class_pattern(_KANJI_RANGES)}]")
+_JAPANESE_WORD_RE = re.compile(
+    f"[{_char_class_pattern(_KANJI_RANGES, _HIRAGANA_RANGES, _KATAKANA_RANGES)}]*"
+)
 
 
 def check_contains_kanji(word: str) -> bool:
-    return any([is_kanji(ch) for ch in word])
+    return _KANJI_RE.search(word) is not None
 
 
 def check_only_japanese_chars(word: str) -> bool:
-    return all([is_japanese_char(ch) for ch in word])
+    return _JAPANESE_WORD_RE.fullmatch(word) is not None
 
 
 def to_hiragana(word: str) -> str:
@@ -19,28 +93,38 @@ def to_katakana(word: str) -> str:
 
 
 def write_normal_html(word: str):
-    return f"<span>{word}</span>"
+    return f"<span>{escape(word, quote=False)}</span>"
 
 
 def write_kanji_html(word_id: str, kanji: str, furigana: str, okurigana: str) -> str:
-    return f"<span><ruby data-word-id={word_id}><rb>{kanji}</rb><rp>(</rp><rt>{furigana}</rt><rp>)</rp></ruby>{okurigana}</span>"
+    return (
+        f'<span><ruby data-word-id="{escape(word_id)}">'
+        f"<rb>{escape(kanji, quote=False)}</rb><rp>(</rp>"
+        f"<rt>{escape(furigana, quote=False)}</rt><rp>)</rp></ruby>"
+        f"{escape(okurigana, quote=False)}</span>"
+    )
+
+
+def _char_class(ch) -> int:
+    cp = ord(ch)
+    return _CHAR_CLASSES[cp] if cp < _TABLE_SIZE else 0
 
 
 def is_japanese_char(ch) -> bool:
-    return any([is_kanji(ch), is_hiragana(ch), is_katakana(ch)])
+    return _char_class(ch) != 0
 
 
 def is_kanji(ch) -> bool:
-    return "CJK UNIFIED IDEOGRAPH" in unicodedata.name(ch)
+    return bool(_char_class(ch) & _KANJI)
 
 
 def is_hiragana(ch) -> bool:
-    return "HIRAGANA" in unicodedata.name(ch)
+    return bool(_char_class(ch) & _HIRAGANA)
 
 
 def is_katakana(ch) -> bool:
-    return "KATAKANA" in unicodedata.name(ch)
+    return bool(_char_class(ch) & _KATAKANA)
 
 
 def is_punctuation(ch) -> bool:
-    return not (is_kanji(ch) or is_hiragana(ch) or is_katakana(ch))
+    return _char_class(ch) == 0
@@ -83,14 +83,46 @@ WSGI_APPLICATION = "src.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# SQLite by default; e.g. DB_ENGINE=django.db.backends.postgresql DB_NAME=jidou_hikki
+# (with psycopg2 installed) runs on a local PostgreSQL server instead.
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "ENGINE": os.getenv("DB_ENGINE", "django.db.backends.sqlite3"),
+        "NAME": os.getenv("DB_NAME", str(BASE_DIR / "db.sqlite3")),
+        "USER": os.getenv("DB_USER", ""),
+        "PASSWORD": os.getenv("DB_PASSWORD", ""),
+        "HOST": os.getenv("DB_HOST", ""),
+        "PORT": os.getenv("DB_PORT", ""),
     }
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Shared by all workers; the table is created by `manage.py createcachetable`.
+    "jisho": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "jisho_cache",
+        "OPTIONS": {"MAX_ENTRIES": 200000},
+    },
+    # Whole-text analysis results (see `src.services.analysis`). An entry is the
+    # pickled HTML and word lists of one text, roughly 30-60x the text's size, so the
+    # table holds at most MAX_ENTRIES x that for texts up to
+    # ANALYSIS_CACHE_MAX_TEXT_LENGTH (about 500 x 120KB in the worst case). Expired
+    # rows and the oldest third are culled when MAX_ENTRIES is exceeded.
+    "analysis": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "analysis_cache",
+        "OPTIONS": {"MAX_ENTRIES": 500},
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -136,6 +168,50 @@ STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 TOKENIZER_CLASS = "src.services.tokenizer.sudachi.SudachiTokenizer"
+# Maximum number of morpheme -> Token entries kept per process (0 disables caching)
+TOKENIZER_CACHE_SIZE = int(os.getenv("TOKENIZER_CACHE_SIZE", "16384"))
+# Distinct token -> HTML fragments kept by the renderer
+HTML_FRAGMENT_CACHE_SIZE = int(os.getenv("HTML_FRAGMENT_CACHE_SIZE", "65536"))
+# Token id -> vocabulary ids resolved by the legacy jidou_hikki app, kept per process
+TOKEN_INDEX_CACHE_SIZE = int(os.getenv("TOKEN_INDEX_CACHE_SIZE", "65536"))
+# How whole documents are tokenized: "serial" (in-process) or "process" (process pool)
+TOKENIZER_BACKEND = os.getenv("TOKENIZER_BACKEND", "serial")
+# Pool size for the "process" backend (defaults to the number of CPUs)
+TOKENIZER_POOL_WORKERS = int(os.getenv("TOKENIZER_POOL_WORKERS", "0")) or None
+# Lines sent to a pool process at once
+TOKENIZER_POOL_BATCH_SIZE = int(os.getenv("TOKENIZER_POOL_BATCH_SIZE", "256"))
+# Documents shorter than this are tokenized in-process to skip the IPC overhead
+TOKENIZER_POOL_MIN_LINES = int(os.getenv("TOKENIZER_POOL_MIN_LINES", "1024"))
+
+JISHO_CLASS = os.getenv("JISHO_CLASS", "src.services.dictionary.jamdict.JamdictJisho")
+# Index used by `CompactJisho`, built with `python manage.py build_jmdict_index`
+JMDICT_INDEX_PATH = os.getenv("JMDICT_INDEX_PATH", str(BASE_DIR / "jmdict.idx"))
+# Dictionary lookups kept in the per-process cache (0 disables it)
+JISHO_CACHE_SIZE = int(os.getenv("JISHO_CACHE_SIZE", "8192"))
+# Cache alias shared across workers as a second tier (empty disables it)
+JISHO_CACHE_ALIAS = os.getenv("JISHO_CACHE_ALIAS", "jisho")
+# Seconds before a shared cache entry expires (dictionary data rarely changes)
+JISHO_CACHE_TIMEOUT = int(os.getenv("JISHO_CACHE_TIMEOUT", str(7 * 24 * 3600)))
+# Threads running tokenization for the async (ASGI) endpoints; keep it small, the
+# work holds the GIL (use TOKENIZER_BACKEND=process for CPU parallelism)
+ASYNC_CPU_WORKERS = int(os.getenv("ASYNC_CPU_WORKERS", "2"))
+# Cache alias of whole-text analysis results, keyed by content hash (empty disables it)
+ANALYSIS_CACHE_ALIAS = os.getenv("ANALYSIS_CACHE_ALIAS", "analysis")
+ANALYSIS_CACHE_TIMEOUT = int(os.getenv("ANALYSIS_CACHE_TIMEOUT", str(30 * 24 * 3600)))
+# Longer texts (in characters) are analyzed without the cache, see CACHES["analysis"]
+ANALYSIS_CACHE_MAX_TEXT_LENGTH = int(
+    os.getenv("ANALYSIS_CACHE_MAX_TEXT_LENGTH", "2000")
+)
 
 DEMO_ONLY = os.getenv("DEMO_ONLY", "false")
 DEMO_ONLY = DEMO_ONLY.lower() == "true"
+
+# Parse notebooks in a background worker (`python manage.py parse_worker`) instead
+# of inside the request.
+NOTEBOOK_ASYNC_PARSING = os.getenv("NOTEBOOK_ASYNC_PARSING", "true")
+NOTEBOOK_ASYNC_PARSING = NOTEBOOK_ASYNC_PARSING.lower() == "true"
+# Seconds without a progress heartbeat after which a processing job is assumed to be
+# abandoned
+NOTEBOOK_PARSE_JOB_TIMEOUT = int(os.getenv("NOTEBOOK_PARSE_JOB_TIMEOUT", "600"))
+# Attempts after which an abandoned job is failed rather than requeued
+NOTEBOOK_PARSE_JOB_MAX_ATTEMPTS = int(os.getenv("NOTEBOOK_PARSE_JOB_MAX_ATTEMPTS", "3"))
@@ -7,14 +7,17 @@ from django.contrib import admin
 
 from src.apps.common.api.auth import router as auth_router
 from src.apps.notebook.api.notebooks import router as notebook_router
+from src.apps.notebook.api.notebooks_async import router as async_notebook_router
 
 api = NinjaAPI(csrf=True)
 api.add_router("/auth", auth_router, tags=["auth"])
 api.add_router("/notebooks", notebook_router, tags=["notebooks"], auth=django_auth)
+# Authenticates in the views, see `notebooks_async.login_required`.
+api.add_router("/async/notebooks", async_notebook_router, tags=["notebooks (async)"])
 
 urlpatterns = [
     path("api/", api.urls),
     path("admin/", admin.site.urls),
 ]
 
-urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
\ No newline at end of file
+urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)